@@ -0,0 +1,197 @@
+-- Checks that the app's queries use the indexes from setup-table.sql.
+-- Run against a scratch local Postgres:
+--
+--   psql -v ON_ERROR_STOP=1 -d postgres -f database/check-plans.sql
+--
+-- Everything runs in one transaction that is rolled back, so the database is
+-- left as it was. A query that misses its index raises an error.
+
+BEGIN;
+
+-- Stand-ins for what Supabase provides
+CREATE SCHEMA auth;
+CREATE TABLE auth.users (id uuid PRIMARY KEY);
+CREATE FUNCTION auth.uid() RETURNS uuid
+LANGUAGE sql STABLE
+AS $$ SELECT nullif(current_setting('request.jwt.claim.sub', true), '')::uuid $$;
+CREATE PUBLICATION supabase_realtime;
+
+\ir setup-table.sql
+
+-- 200 users with 500 tasks, 20 tags and 100 tombstones each; user N has id md5(N)
+INSERT INTO auth.users (id)
+SELECT md5(u::text)::uuid FROM generate_series(1, 200) AS u;
+
+INSERT INTO public.task_table (name, user_id, due_date, is_completed, description, updated_at)
+SELECT
+  'task ' || t,
+  md5(u::text)::uuid,
+  CASE WHEN t % 7 = 0 THEN NULL ELSE now() + (t - 250) * interval '1 hour' END,
+  t % 3 = 0,
+  repeat('notes ', 20),
+  now() - t * interval '1 hour'
+FROM generate_series(1, 200) AS u, generate_series(1, 500) AS t;
+
+INSERT INTO public.tag_table (name, user_id)
+SELECT 'tag' || g || '-' || substr(md5(u::text || g::text), 1, 8), md5(u::text)::uuid
+FROM generate_series(1, 200) AS u, generate_series(1, 20) AS g;
+
+INSERT INTO public.task_tag_join_table (task_id, tag_id, user_id)
+SELECT ts.id, tg.id, ts.user_id
+FROM public.task_table AS ts
+JOIN public.tag_table AS tg
+  ON tg.user_id = ts.user_id
+  AND tg.name LIKE 'tag' || (ts.id % 20 + 1) || '-%';
+
+INSERT INTO public.tombstone_table (table_name, row_id, user_id, deleted_at)
+SELECT 'task_table', 1000000 + t, md5(u::text)::uuid, now() - t * interval '1 hour'
+FROM generate_series(1, 200) AS u, generate_series(1, 100) AS t;
+
+ANALYZE;
+
+CREATE FUNCTION pg_temp.expect_index(label text, query text, index_name text)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  plan json;
+BEGIN
+  EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+  IF position(format('"Index Name": "%s"', index_name) IN plan::text) = 0 THEN
+    RAISE EXCEPTION '% does not use %: %', label, index_name, plan;
+  END IF;
+  RAISE NOTICE 'ok: % uses %', label, index_name;
+END;
+$$;
+
+-- The user the queries run for: md5('1')::uuid
+SELECT set_config('request.jwt.claim.sub', 'c4ca4238-a0b9-2382-0dcc-509a6f75849b', true);
+
+SELECT pg_temp.expect_index(
+  'upcoming page after a cursor',
+  $q$SELECT id FROM public.task_table
+     WHERE user_id = 'c4ca4238-a0b9-2382-0dcc-509a6f75849b' AND is_completed = false
+       AND due_date >= now() + interval '1 day' AND (due_date, id) > (now() + interval '1 day', 0)
+     ORDER BY due_date, id LIMIT 100$q$,
+  'task_table_user_completed_due_idx'
+);
+
+SELECT pg_temp.expect_index(
+  'completed page after a cursor',
+  $q$SELECT id FROM public.task_table
+     WHERE user_id = 'c4ca4238-a0b9-2382-0dcc-509a6f75849b' AND is_completed = true AND id > 100
+     ORDER BY id LIMIT 100$q$,
+  'task_table_user_completed_id_idx'
+);
+
+SELECT pg_temp.expect_index(
+  'task delta',
+  $q$SELECT id, name, user_id, created_at, due_date, is_completed, updated_at
+     FROM public.task_table
+     WHERE user_id = 'c4ca4238-a0b9-2382-0dcc-509a6f75849b' AND updated_at >= now() - interval '1 minute'$q$,
+  'task_table_user_updated_idx'
+);
+
+SELECT pg_temp.expect_index(
+  'tombstone delta',
+  $q$SELECT table_name, row_id, tag_id, deleted_at
+     FROM public.tombstone_table
+     WHERE user_id = 'c4ca4238-a0b9-2382-0dcc-509a6f75849b' AND deleted_at >= now() - interval '1 minute'$q$,
+  'tombstone_table_user_deleted_idx'
+);
+
+SELECT pg_temp.expect_index(
+  'tag by name',
+  $q$SELECT * FROM public.tag_table
+     WHERE name = 'tag1' AND user_id = 'c4ca4238-a0b9-2382-0dcc-509a6f75849b'$q$,
+  'tag_table_user_id_name_key'
+);
+
+SELECT pg_temp.expect_index(
+  'tasks for a tag',
+  $q$SELECT task_id, task_name, tag_id, tag_name
+     FROM public.task_tag_view
+     WHERE tag_id = 1$q$,
+  'task_tag_join_table_tag_id_idx'
+);
+
+-- A second spelling of an existing tag name is rejected
+DO $$
+BEGIN
+  INSERT INTO public.tag_table (name, user_id)
+  SELECT upper(name), user_id FROM public.tag_table ORDER BY id LIMIT 1;
+  RAISE EXCEPTION 'tag names differing only in case were accepted';
+EXCEPTION
+  WHEN unique_violation THEN
+    RAISE NOTICE 'ok: tag names are unique regardless of case';
+END;
+$$;
+
+-- The snapshot RPC returns the first page with tag ids and tag counts, and
+-- following its "next" cursors visits every task once, in TODO-list order
+DO $$
+DECLARE
+  pinned timestamptz := now();
+  snapshot json;
+  cursor json;
+  seen bigint[] := '{}';
+  expected bigint[];
+BEGIN
+  snapshot := public.get_task_snapshot(pinned, NULL, 100);
+  IF json_array_length(snapshot -> 'tasks') <> 100 OR json_array_length(snapshot -> 'tags') <> 20 THEN
+    RAISE EXCEPTION 'unexpected get_task_snapshot result';
+  END IF;
+  LOOP
+    seen := seen || ARRAY(SELECT (task ->> 'id')::bigint FROM json_array_elements(snapshot -> 'tasks') AS task);
+    cursor := snapshot -> 'next';
+    EXIT WHEN json_array_length(snapshot -> 'tasks') < 100;
+    snapshot := public.get_task_snapshot(pinned, cursor, 100);
+    IF snapshot -> 'tags' IS NOT NULL AND json_typeof(snapshot -> 'tags') <> 'null' THEN
+      RAISE EXCEPTION 'get_task_snapshot sent tags after the first page';
+    END IF;
+  END LOOP;
+  expected := ARRAY(
+    SELECT id FROM public.task_table
+    WHERE user_id = auth.uid()
+    ORDER BY
+      CASE WHEN is_completed THEN 3 WHEN due_date >= pinned THEN 0 WHEN due_date < pinned THEN 1 ELSE 2 END,
+      CASE WHEN NOT is_completed AND due_date >= pinned THEN extract(epoch FROM due_date) END,
+      CASE WHEN NOT is_completed AND due_date < pinned THEN extract(epoch FROM due_date) END DESC,
+      id
+  );
+  IF seen <> expected THEN
+    RAISE EXCEPTION 'get_task_snapshot pages skip, repeat or reorder tasks';
+  END IF;
+  RAISE NOTICE 'ok: get_task_snapshot pages by key through % tasks', cardinality(seen);
+END;
+$$;
+
+-- A signed-in user sees, and can add, only links between their own rows
+CREATE ROLE tuido_check_user;
+GRANT USAGE ON SCHEMA public, auth TO tuido_check_user;
+GRANT SELECT, INSERT ON public.task_table, public.tag_table, public.task_tag_join_table TO tuido_check_user;
+CREATE TEMP TABLE other_user_tag AS
+SELECT id FROM public.tag_table WHERE user_id <> 'c4ca4238-a0b9-2382-0dcc-509a6f75849b' LIMIT 1;
+GRANT SELECT ON other_user_tag TO tuido_check_user;
+SET LOCAL ROLE tuido_check_user;
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM public.task_tag_join_table WHERE user_id IS DISTINCT FROM auth.uid()) THEN
+    RAISE EXCEPTION 'task_tag_join_table shows other users'' links';
+  END IF;
+  BEGIN
+    INSERT INTO public.task_tag_join_table (task_id, tag_id)
+    SELECT ts.id, other_user_tag.id
+    FROM public.task_table AS ts, other_user_tag
+    WHERE ts.user_id = auth.uid()
+    LIMIT 1;
+    RAISE EXCEPTION 'a link to another user''s tag was accepted';
+  EXCEPTION
+    WHEN insufficient_privilege THEN
+      RAISE NOTICE 'ok: task_tag_join_table is scoped to the signed-in user';
+  END;
+END;
+$$;
+RESET ROLE;
+
+ROLLBACK;
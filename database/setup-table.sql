@@ -1,47 +1,90 @@
-CREATE TABLE public.task_table (
+-- Safe to run again: on an existing database it adds whatever is missing
+-- (columns, tables, triggers, policies, indexes) and replaces the functions
+-- and the view. Run it in one transaction:
+--
+--   psql -1 -v ON_ERROR_STOP=1 -f database/setup-table.sql
+
+CREATE TABLE IF NOT EXISTS public.task_table (
   id BIGINT primary key generated always as identity,
   name text,
   user_id uuid references auth.users on delete cascade,
   created_at timestamptz default now(),
   due_date timestamptz default null,
   is_completed boolean default false,
-  description text default null
+  description text default null,
+  updated_at timestamptz default now()
 );
 
+ALTER TABLE public.task_table ADD COLUMN IF NOT EXISTS updated_at timestamptz default now();
+
 ALTER TABLE public.task_table ENABLE ROW LEVEL SECURITY;
 
+DROP POLICY IF EXISTS "Allow all only authenticated user" ON public.task_table;
 CREATE POLICY "Allow all only authenticated user" ON public.task_table
 FOR ALL
 USING (user_id = auth.uid())
 WITH CHECK (user_id = auth.uid());
 
-CREATE TABLE public.tag_table (
+CREATE TABLE IF NOT EXISTS public.tag_table (
   id BIGINT primary key generated always as identity,
   name text,
   user_id uuid references auth.users on delete cascade,
-  description text default null
+  description text default null,
+  updated_at timestamptz default now(),
+  UNIQUE (user_id, name)
 );
 
+ALTER TABLE public.tag_table ADD COLUMN IF NOT EXISTS updated_at timestamptz default now();
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'tag_table_user_id_name_key') THEN
+    ALTER TABLE public.tag_table ADD CONSTRAINT tag_table_user_id_name_key UNIQUE (user_id, name);
+  END IF;
+END;
+$$;
+
 ALTER TABLE public.tag_table ENABLE ROW LEVEL SECURITY;
 
+DROP POLICY IF EXISTS "Allow all only authenticated user" ON public.tag_table;
 CREATE POLICY "Allow all only authenticated user" ON public.tag_table
 FOR ALL
 USING (user_id = auth.uid())
 WITH CHECK (user_id = auth.uid());
 
-CREATE TABLE public.task_tag_join_table (
+-- user_id scopes the rows (and the Realtime feed) to the owner of the task
+-- and the tag; the client leaves it to the default
+CREATE TABLE IF NOT EXISTS public.task_tag_join_table (
   task_id BIGINT NOT NULL REFERENCES public.task_table(id) ON DELETE CASCADE,
   tag_id BIGINT NOT NULL REFERENCES public.tag_table(id) ON DELETE CASCADE,
+  user_id uuid default auth.uid() references auth.users on delete cascade,
+  updated_at timestamptz default now(),
   PRIMARY KEY (task_id, tag_id)
 );
 
+ALTER TABLE public.task_tag_join_table ADD COLUMN IF NOT EXISTS user_id uuid default auth.uid() references auth.users on delete cascade;
+ALTER TABLE public.task_tag_join_table ADD COLUMN IF NOT EXISTS updated_at timestamptz default now();
+
+-- Links made before user_id existed belong to their task's owner
+UPDATE public.task_tag_join_table AS tt
+SET user_id = ts.user_id
+FROM public.task_table AS ts
+WHERE ts.id = tt.task_id AND tt.user_id IS NULL;
+
 ALTER TABLE public.task_tag_join_table ENABLE ROW LEVEL SECURITY;
 
+DROP POLICY IF EXISTS "Allow all only authenticated user" ON public.task_tag_join_table;
 CREATE POLICY "Allow all only authenticated user" ON public.task_tag_join_table
 FOR ALL
-USING (true)
-WITH CHECK (true);
+USING (user_id = auth.uid())
+WITH CHECK (
+  user_id = auth.uid()
+  AND EXISTS (SELECT 1 FROM public.task_table AS ts WHERE ts.id = task_id AND ts.user_id = auth.uid())
+  AND EXISTS (SELECT 1 FROM public.tag_table AS tg WHERE tg.id = tag_id AND tg.user_id = auth.uid())
+);
 
+-- Dropped first: CREATE OR REPLACE VIEW cannot add columns in the middle
+DROP VIEW IF EXISTS public.task_tag_view;
 CREATE VIEW public.task_tag_view AS
 SELECT
   ts.id AS task_id,
@@ -51,6 +94,8 @@ SELECT
   ts.due_date AS task_due_date,
   ts.is_completed AS task_is_completed,
   ts.description AS task_description,
+  ts.updated_at AS task_updated_at,
+  tt.updated_at AS link_updated_at,
   tg.id AS tag_id,
   tg.name AS tag_name,
   tg.user_id AS tag_user_id,
@@ -61,3 +106,255 @@ JOIN task_tag_join_table AS tt
 JOIN tag_table AS tg
   ON tt.tag_id = tg.id
   AND ts.user_id = tg.user_id;
+
+CREATE TABLE IF NOT EXISTS public.tombstone_table (
+  id BIGINT primary key generated always as identity,
+  table_name text NOT NULL,
+  row_id BIGINT NOT NULL,
+  tag_id BIGINT default null,
+  user_id uuid references auth.users on delete cascade,
+  deleted_at timestamptz default now()
+);
+
+ALTER TABLE public.tombstone_table ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow read only authenticated user" ON public.tombstone_table;
+CREATE POLICY "Allow read only authenticated user" ON public.tombstone_table
+FOR SELECT
+USING (user_id = auth.uid());
+
+CREATE OR REPLACE FUNCTION public.set_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER task_table_set_updated_at
+BEFORE UPDATE ON public.task_table
+FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+CREATE OR REPLACE TRIGGER tag_table_set_updated_at
+BEFORE UPDATE ON public.tag_table
+FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+CREATE OR REPLACE FUNCTION public.record_tombstone()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'task_tag_join_table' THEN
+    INSERT INTO public.tombstone_table (table_name, row_id, tag_id, user_id)
+    VALUES (
+      TG_TABLE_NAME,
+      OLD.task_id,
+      OLD.tag_id,
+      COALESCE(
+        OLD.user_id,
+        (SELECT user_id FROM public.task_table WHERE id = OLD.task_id),
+        (SELECT user_id FROM public.tag_table WHERE id = OLD.tag_id)
+      )
+    );
+  ELSE
+    INSERT INTO public.tombstone_table (table_name, row_id, user_id)
+    VALUES (TG_TABLE_NAME, OLD.id, OLD.user_id);
+  END IF;
+  RETURN OLD;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER task_table_record_tombstone
+AFTER DELETE ON public.task_table
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+
+CREATE OR REPLACE TRIGGER tag_table_record_tombstone
+AFTER DELETE ON public.tag_table
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+
+CREATE OR REPLACE TRIGGER task_tag_join_table_record_tombstone
+AFTER DELETE ON public.task_tag_join_table
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+
+DO $$
+DECLARE
+  table_name text;
+BEGIN
+  FOREACH table_name IN ARRAY ARRAY['task_table', 'tag_table', 'task_tag_join_table', 'tombstone_table'] LOOP
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = table_name
+    ) THEN
+      EXECUTE format('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', table_name);
+    END IF;
+  END LOOP;
+END;
+$$;
+
+-- One page of the caller's tasks in TODO-list order, each with its tag ids,
+-- plus (on the first page) every tag with the counts shown in the TAGS tab.
+-- Pages are keyed rather than offset: p_after is the "next" cursor of the
+-- previous page and p_now is fixed for the whole stream, so every page is an
+-- index range scan and no task moves between groups mid-stream. The groups are
+-- upcoming (due_date ascending), overdue (due_date descending), undated, then
+-- completed, each tie-broken by id.
+-- The first version paged by offset
+DROP FUNCTION IF EXISTS public.get_task_snapshot(integer, integer);
+CREATE OR REPLACE FUNCTION public.get_task_snapshot(
+  p_now timestamptz DEFAULT now(),
+  p_after json DEFAULT NULL,
+  p_limit integer DEFAULT NULL
+)
+RETURNS json
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  WITH page AS (
+    (
+      SELECT ts.*, 0 AS sort_group, row_number() OVER (ORDER BY ts.due_date, ts.id) AS sort_rank
+      FROM task_table AS ts
+      WHERE ts.user_id = auth.uid()
+        AND ts.is_completed = false
+        AND ts.due_date >= CASE WHEN (p_after ->> 'sort_group')::integer = 0 THEN (p_after ->> 'due_date')::timestamptz ELSE p_now END
+        AND COALESCE((p_after ->> 'sort_group')::integer, -1) <= 0
+        AND (p_after IS NULL OR (ts.due_date, ts.id) > ((p_after ->> 'due_date')::timestamptz, (p_after ->> 'id')::bigint))
+      ORDER BY ts.due_date, ts.id
+      LIMIT p_limit
+    )
+    UNION ALL
+    (
+      SELECT ts.*, 1, row_number() OVER (ORDER BY ts.due_date DESC, ts.id)
+      FROM task_table AS ts
+      WHERE ts.user_id = auth.uid()
+        AND ts.is_completed = false
+        AND ts.due_date < p_now
+        AND ts.due_date <= CASE WHEN (p_after ->> 'sort_group')::integer = 1 THEN (p_after ->> 'due_date')::timestamptz ELSE 'infinity' END
+        AND COALESCE((p_after ->> 'sort_group')::integer, -1) <= 1
+        AND (
+          COALESCE((p_after ->> 'sort_group')::integer, -1) < 1
+          OR ts.due_date < (p_after ->> 'due_date')::timestamptz
+          OR ts.id > (p_after ->> 'id')::bigint
+        )
+      ORDER BY ts.due_date DESC, ts.id
+      LIMIT p_limit
+    )
+    UNION ALL
+    (
+      SELECT ts.*, 2, row_number() OVER (ORDER BY ts.id)
+      FROM task_table AS ts
+      WHERE ts.user_id = auth.uid()
+        AND ts.is_completed = false
+        AND ts.due_date IS NULL
+        AND ts.id > CASE WHEN (p_after ->> 'sort_group')::integer = 2 THEN (p_after ->> 'id')::bigint ELSE 0 END
+        AND COALESCE((p_after ->> 'sort_group')::integer, -1) <= 2
+      ORDER BY ts.id
+      LIMIT p_limit
+    )
+    UNION ALL
+    (
+      SELECT ts.*, 3, row_number() OVER (ORDER BY ts.id)
+      FROM task_table AS ts
+      WHERE ts.user_id = auth.uid()
+        AND ts.is_completed = true
+        AND ts.id > CASE WHEN (p_after ->> 'sort_group')::integer = 3 THEN (p_after ->> 'id')::bigint ELSE 0 END
+      ORDER BY ts.id
+      LIMIT p_limit
+    )
+    ORDER BY sort_group, sort_rank
+    LIMIT p_limit
+  )
+  SELECT json_build_object(
+    'tasks', COALESCE((
+      SELECT json_agg(
+        json_build_object(
+          'id', page.id,
+          'name', page.name,
+          'user_id', page.user_id,
+          'created_at', page.created_at,
+          'due_date', page.due_date,
+          'is_completed', page.is_completed,
+          'updated_at', page.updated_at,
+          'tag_ids', COALESCE((
+            SELECT json_agg(tt.tag_id ORDER BY tt.tag_id)
+            FROM task_tag_join_table AS tt
+            JOIN tag_table AS tg
+              ON tg.id = tt.tag_id
+              AND tg.user_id = page.user_id
+            WHERE tt.task_id = page.id
+          ), '[]'::json)
+        )
+        ORDER BY page.sort_group, page.sort_rank
+      )
+      FROM page
+    ), '[]'::json),
+    'next', (
+      SELECT json_build_object('sort_group', page.sort_group, 'due_date', page.due_date, 'id', page.id)
+      FROM page
+      ORDER BY page.sort_group DESC, page.sort_rank DESC
+      LIMIT 1
+    ),
+    'tags', CASE WHEN p_after IS NULL THEN COALESCE((
+      SELECT json_agg(
+        json_build_object(
+          'id', tg.id,
+          'name', tg.name,
+          'user_id', tg.user_id,
+          'description', tg.description,
+          'updated_at', tg.updated_at,
+          'task_count', counts.task_count,
+          'completed_count', counts.completed_count
+        )
+        ORDER BY tg.id
+      )
+      FROM tag_table AS tg
+      CROSS JOIN LATERAL (
+        SELECT
+          count(*) AS task_count,
+          count(*) FILTER (WHERE ts.is_completed) AS completed_count
+        FROM task_tag_join_table AS tt
+        JOIN task_table AS ts
+          ON ts.id = tt.task_id
+          AND ts.user_id = tg.user_id
+        WHERE tt.tag_id = tg.id
+      ) AS counts
+      WHERE tg.user_id = auth.uid()
+    ), '[]'::json) END
+  );
+$$;
+
+-- Indexes for the queries the app sends; all of them filter on user_id.
+-- database/check-plans.sql checks that the planner picks them.
+-- get_task_snapshot pages: upcoming, overdue and undated tasks by due date
+-- then id, completed tasks by id
+CREATE INDEX IF NOT EXISTS task_table_user_completed_due_idx
+ON public.task_table (user_id, is_completed, due_date, id);
+
+CREATE INDEX IF NOT EXISTS task_table_user_completed_id_idx
+ON public.task_table (user_id, is_completed, id);
+
+-- Delta sync reads rows changed since the last watermark
+CREATE INDEX IF NOT EXISTS task_table_user_updated_idx
+ON public.task_table (user_id, updated_at);
+
+CREATE INDEX IF NOT EXISTS tag_table_user_updated_idx
+ON public.tag_table (user_id, updated_at);
+
+CREATE INDEX IF NOT EXISTS task_tag_join_table_updated_idx
+ON public.task_tag_join_table (updated_at);
+
+CREATE INDEX IF NOT EXISTS tombstone_table_user_deleted_idx
+ON public.tombstone_table (user_id, deleted_at);
+
+-- Tag names are unique per user regardless of case. UNIQUE (user_id, name)
+-- stays: upsert_tags() names it as the conflict target.
+CREATE UNIQUE INDEX IF NOT EXISTS tag_table_user_lower_name_key
+ON public.tag_table (user_id, lower(name));
+
+-- task_tag_view and the tag counts go from a tag to its tasks
+CREATE INDEX IF NOT EXISTS task_tag_join_table_tag_id_idx
+ON public.task_tag_join_table (tag_id);
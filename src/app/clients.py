@@ -0,0 +1,45 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+SUPABASE_CREDENTIALS_PATH = Path(__file__).resolve().parent.parent.parent / "credentials" / "supabase.json"
+
+def load_supabase_credentials(path: Path = SUPABASE_CREDENTIALS_PATH) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class LazySupabaseClient:
+    # Stands in for supabase.Client; the supabase package is imported and the
+    # client built on first attribute access, so startup does not pay for it
+    def __init__(self, url: str, key: str, transport: Optional[dict] = None):
+        self.url = url
+        self.key = key
+        self.transport = transport
+        self.http_client: Optional[Any] = None
+        self.http_stats: Optional[Any] = None
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import ClientOptions, create_client
+                    from .transport import ConnectionStats, TransportSettings, build_http_client
+
+                    # One pooled httpx client is shared by auth and PostgREST, and
+                    # survives the PostgREST client being rebuilt on token refresh
+                    self.http_stats = ConnectionStats()
+                    self.http_client = build_http_client(TransportSettings.from_dict(self.transport), self.http_stats)
+                    self._client = create_client(self.url, self.key, options=ClientOptions(httpx_client=self.http_client))
+        return self._client
+
+    def close(self):
+        if self.http_client is not None:
+            self.http_client.close()
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
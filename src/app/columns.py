@@ -0,0 +1,121 @@
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .helpers import DateTimeHelper
+from .models import Task, intern_text, parse_due_epoch
+
+# Marks a missing timestamp in the integer epoch columns
+NO_TIME = -(2 ** 63)
+
+
+def epoch_from_iso(iso_text: Optional[str]) -> int:
+    epoch = parse_due_epoch(iso_text)
+    return NO_TIME if epoch is None else epoch
+
+
+def iso_from_epoch(epoch: int) -> Optional[str]:
+    if epoch == NO_TIME:
+        return None
+    return datetime.fromtimestamp(epoch, DateTimeHelper.JST_TZ).isoformat()
+
+
+class TaskColumns:
+    # Column-per-field storage for large task histories (mostly the DONE tab).
+    # Timestamps are kept as integer epoch seconds and strings are interned.
+    def __init__(self, user_id: str):
+        self.user_id = intern_text(user_id)
+        self.ids = array("q")
+        self.is_completed = array("b")
+        self.due_epochs = array("q")
+        self.created_epochs = array("q")
+        self.updated_epochs = array("q")
+        self.names: List[Optional[str]] = []
+        self.descriptions: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, task_data: Dict[str, Any]) -> "TaskRow":
+        self.ids.append(task_data["id"])
+        self.is_completed.append(bool(task_data.get("is_completed")))
+        self.due_epochs.append(epoch_from_iso(task_data.get("due_date")))
+        self.created_epochs.append(epoch_from_iso(task_data.get("created_at")))
+        self.updated_epochs.append(epoch_from_iso(task_data.get("updated_at")))
+        self.names.append(task_data.get("name"))
+        self.descriptions.append(task_data.get("description"))
+        return TaskRow(self, len(self.ids) - 1)
+
+
+class _Column:
+    def __init__(self, column: str):
+        self.column = column
+
+    def __get__(self, row, owner=None):
+        if row is None:
+            return self
+        return getattr(row.columns, self.column)[row.position]
+
+    def __set__(self, row, value):
+        getattr(row.columns, self.column)[row.position] = value
+
+
+class _TimeColumn(_Column):
+    def __get__(self, row, owner=None):
+        if row is None:
+            return self
+        return iso_from_epoch(getattr(row.columns, self.column)[row.position])
+
+    def __set__(self, row, value):
+        getattr(row.columns, self.column)[row.position] = epoch_from_iso(value)
+
+
+class TaskRow:
+    # Lightweight view over one row of TaskColumns that reads and writes like a Task
+    __slots__ = ("columns", "position")
+
+    id = _Column("ids")
+    name = _Column("names")
+    description = _Column("descriptions")
+    due_date = _TimeColumn("due_epochs")
+    created_at = _TimeColumn("created_epochs")
+    updated_at = _TimeColumn("updated_epochs")
+
+    def __init__(self, columns: TaskColumns, position: int):
+        self.columns = columns
+        self.position = position
+
+    @property
+    def user_id(self) -> str:
+        return self.columns.user_id
+
+    @property
+    def is_completed(self) -> bool:
+        return bool(self.columns.is_completed[self.position])
+
+    @is_completed.setter
+    def is_completed(self, value: bool):
+        self.columns.is_completed[self.position] = bool(value)
+
+    @property
+    def due_epoch(self) -> Optional[int]:
+        epoch = self.columns.due_epochs[self.position]
+        return None if epoch == NO_TIME else epoch
+
+    @property
+    def display_name(self) -> str:
+        return self.name or 'Untitled'
+
+    def to_task(self) -> Task:
+        return Task(
+            id=self.id,
+            name=self.name,
+            user_id=self.user_id,
+            description=self.description,
+            due_date=self.due_date,
+            is_completed=self.is_completed,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
+
+    def __repr__(self) -> str:
+        return f"TaskRow(id={self.id!r}, name={self.name!r}, is_completed={self.is_completed!r})"
@@ -1,45 +1,246 @@
-from typing import List, Optional
+import asyncio
+from typing import Callable, Dict, List, Optional
 from .models import Task, Tag
-from .services import DatabaseService
-from .helpers import DateTimeHelper, TaskDisplayHelper, TaskSorter
+from .services import DatabaseService, AsyncDatabaseService, latest_timestamp
+from .mutations import MutationQueue
+from .indexes import SortedTaskList, TaskIndex
+from .search import SearchIndex
+from .columns import TaskColumns
+from .descriptions import DescriptionCache, DESCRIPTION_LOADING
+from .helpers import DateTimeHelper, TaskDisplayHelper, TagSearchHelper, TaskSorter
+
+# Completed-task count above which the DONE history is hydrated into TaskColumns
+COMPACT_HISTORY_THRESHOLD = 5000
 
 class Controller:
-    def __init__(self, supabase, user_id: str):
+    def __init__(self, supabase, user_id: str, db_service: DatabaseService = None, compact_history_threshold: int = COMPACT_HISTORY_THRESHOLD):
         self.supabase = supabase
         self.user_id = user_id
-        self.pending_tasks: List[Task] = []
-        self.completed_tasks: List[Task] = []
+        self.compact_history_threshold = compact_history_threshold
+        self.pending_tasks = SortedTaskList()
+        self.completed_tasks = SortedTaskList()
         self.tags: List[Tag] = []
-        self.task_tags_cache: dict = {}
-        self.db_service = DatabaseService(supabase, user_id)
+        self.all_tags: List[Tag] = []
+        self.index = TaskIndex()
+        self.search_index = SearchIndex()
+        self.descriptions = DescriptionCache()
+        self.sync_watermark: Optional[str] = None
+        # Server totals and per-tag counts stand in for the loaded counts while a
+        # first load streams in
+        self.totals: Dict[str, int] = {}
+        self.tag_counts: Dict[int, dict] = {}
+        self.streaming = False
+        self.db_service = db_service or DatabaseService(supabase, user_id)
+        self.async_db_service = AsyncDatabaseService(self.db_service)
+        self.mutation_queue = MutationQueue(self.db_service)
 
     def load_all_tasks(self) -> bool:
         try:
             tasks_data = self.db_service.get_all_tasks()
+            all_tags_data = self.db_service.get_all_tags()
+            links_data = self.db_service.get_all_task_tags()
+            self._hydrate(tasks_data, all_tags_data, links_data)
+            return True
+        except Exception as e:
+            return False
 
-            all_tasks = [Task(**task_data) for task_data in tasks_data]
+    async def load_all_tasks_async(self, on_page: Callable[[], None] = None, on_totals: Callable[[], None] = None) -> bool:
+        # Streams task pages in; with on_page and nothing loaded yet, each page is
+        # published as it arrives so the list can paint before the load finishes
+        totals = None
+        try:
+            self.streaming = on_page is not None and not self.index.tasks_by_id
+            if self.streaming and on_totals is not None:
+                totals = asyncio.ensure_future(self._load_totals(on_totals))
+            await self.mutation_queue.flush()
+            stream = self.db_service.stream_all()
+            loader = self._start_hydrate()
+            if self.streaming:
+                self._publish_tasks(loader)
+
+            tags_data, links_data = [], []
+            while True:
+                item = await asyncio.to_thread(next, stream, None)
+                if item is None:
+                    break
+                kind, rows = item
+                if kind == "tasks":
+                    self._hydrate_tasks(loader, rows)
+                    if self.streaming:
+                        on_page()
+                elif kind == "tags":
+                    tags_data = rows
+                    if self.streaming:
+                        self.all_tags = [Tag(**tag) for tag in rows]
+                        self.tags = self.all_tags
+                elif kind == "tag_counts":
+                    if self.streaming:
+                        self.tag_counts = {row["tag_id"]: row for row in rows}
+                elif kind == "links":
+                    links_data = rows
+
+            self._finish_hydrate(loader, tags_data, links_data)
+            return True
+        except Exception as e:
+            return False
+        finally:
+            if totals is not None:
+                totals.cancel()
+            self.streaming = False
+            self.totals = {}
+            self.tag_counts = {}
+
+    async def _load_totals(self, on_totals: Callable[[], None]):
+        # Count-only requests, so the tab badges are right before the rows arrive
+        try:
+            pending, completed, tags = await asyncio.gather(
+                self.async_db_service.count_tasks(False),
+                self.async_db_service.count_tasks(True),
+                self.async_db_service.count_tags(),
+            )
+        except Exception as e:
+            return
+        if self.streaming:
+            totals = {"pending": pending, "completed": completed, "tags": tags}
+            self.totals = {kind: total for kind, total in totals.items() if total is not None}
+            on_totals()
+
+    def get_total(self, kind: str) -> int:
+        loaded = {
+            "pending": len(self.pending_tasks),
+            "completed": len(self.completed_tasks),
+            "tags": len(self.all_tags),
+        }[kind]
+        return self.totals.get(kind, loaded)
+
+    def _hydrate(self, tasks_data: List[dict], all_tags_data: List[dict], links_data: List[dict]):
+        loader = self._start_hydrate()
+        self._hydrate_tasks(loader, tasks_data)
+        self._finish_hydrate(loader, all_tags_data, links_data)
+
+    def _start_hydrate(self) -> dict:
+        return {
+            "index": TaskIndex(),
+            "pending": SortedTaskList(),
+            "completed": SortedTaskList(),
+            "history": None,
+            "completed_count": 0,
+            "timestamps": [],
+        }
 
-            self.task_tags_cache = {}
-            for task in all_tasks:
-                tags_data = self.db_service.get_tags_for_task(task.id)
-                tags = [Tag(id=tag['tag_id'], name=tag['tag_name'], user_id=tag['tag_user_id']) for tag in tags_data]
-                self.task_tags_cache[task.id] = tags
+    def _hydrate_tasks(self, loader: dict, tasks_data: List[dict]):
+        loader["completed_count"] += sum(1 for task_data in tasks_data if task_data.get('is_completed'))
+        if loader["history"] is None and loader["completed_count"] >= self.compact_history_threshold:
+            loader["history"] = TaskColumns(self.user_id)
+        history = loader["history"]
+
+        tasks = [
+            history.append(task_data) if history is not None and task_data.get('is_completed') else Task(**task_data)
+            for task_data in tasks_data
+        ]
+        for task in tasks:
+            loader["index"].add_task(task)
+        loader["pending"].extend(task for task in tasks if not task.is_completed)
+        loader["completed"].extend(task for task in tasks if task.is_completed)
+        loader["timestamps"] += [task_data.get('updated_at') for task_data in tasks_data]
+
+    def _finish_hydrate(self, loader: dict, all_tags_data: List[dict], links_data: List[dict]):
+        self.all_tags = [Tag(**tag) for tag in all_tags_data]
+        self.tags = self.all_tags
+        self._publish_tasks(loader)
+        for task_id, tags in self._build_task_tags_cache(links_data).items():
+            self.index.set_task_tags(task_id, tags)
+        self.sync_watermark = latest_timestamp(loader["timestamps"] + [tag.get('updated_at') for tag in all_tags_data])
+
+    def _publish_tasks(self, loader: dict):
+        self.index = loader["index"]
+        self.pending_tasks = loader["pending"]
+        self.completed_tasks = loader["completed"]
+
+    def _build_task_tags_cache(self, links_data: List[dict]) -> dict:
+        tags_by_id = {tag.id: tag for tag in self.all_tags}
+        task_tags_cache = {}
+        for link in links_data:
+            tag = tags_by_id.get(link['tag_id'])
+            if tag:
+                task_tags_cache.setdefault(link['task_id'], []).append(tag)
+        return task_tags_cache
+
+    def sync_with_remote(self) -> Optional[dict]:
+        try:
+            return self.db_service.sync(self.sync_watermark)
+        except Exception as e:
+            return {}
 
-            all_tags_data = self.db_service.get_all_tags()
-            self.all_tags = [Tag(**tag) for tag in all_tags_data]
-            self.tags = self.all_tags
+    async def sync_with_remote_async(self) -> Optional[dict]:
+        await self.mutation_queue.flush()
+        return await asyncio.to_thread(self.sync_with_remote)
 
-            self.pending_tasks = [task for task in all_tasks if not task.is_completed]
-            self.completed_tasks = [task for task in all_tasks if task.is_completed]
+    def apply_changes(self, changes: dict) -> bool:
+        try:
+            if not any(changes.get(key) for key in ("tasks", "tags", "links", "deleted")):
+                return False
 
-            self.pending_tasks = TaskSorter.sort_tasks_by_priority(self.pending_tasks)
-            self.completed_tasks = TaskSorter.sort_tasks_by_priority(self.completed_tasks)
+            deleted_task_ids = set()
+            deleted_tag_ids = set()
+            deleted_links = set()
+            for row in changes.get("deleted", []):
+                if row["table_name"] == "task_table":
+                    deleted_task_ids.add(row["row_id"])
+                elif row["table_name"] == "tag_table":
+                    deleted_tag_ids.add(row["row_id"])
+                elif row["table_name"] == "task_tag_join_table":
+                    deleted_links.add((row["row_id"], row["tag_id"]))
+
+            for task_id in deleted_task_ids:
+                self._remove_task(task_id)
+                self.index.pop_task_tags(task_id)
+            for task_data in changes.get("tasks", []):
+                self._remove_task(task_data["id"])
+                self._insert_task(Task(**task_data))
+                if "description" in task_data:
+                    self.descriptions.put(task_data["id"], task_data["description"])
+                else:
+                    self.descriptions.discard(task_data["id"])
+
+            tags_by_id = {tag.id: tag for tag in self.all_tags}
+            for tag_id in deleted_tag_ids:
+                tags_by_id.pop(tag_id, None)
+                self.index.remove_tag(tag_id)
+            for tag_data in changes.get("tags", []):
+                existing_tag = tags_by_id.get(tag_data["id"])
+                if existing_tag:
+                    for key, value in tag_data.items():
+                        setattr(existing_tag, key, value)
+                    self.index.touch_tag(existing_tag.id)
+                else:
+                    tags_by_id[tag_data["id"]] = Tag(**tag_data)
+            self.all_tags = list(tags_by_id.values())
+            self.tags = self.all_tags
 
+            for task_id, tag_id in deleted_links:
+                self.index.remove_task_tag(task_id, tag_id)
+            for link in changes.get("links", []):
+                tag = tags_by_id.get(link["tag_id"])
+                if tag and self.index.get_task(link["task_id"]):
+                    self.index.add_task_tag(link["task_id"], tag)
+
+            self.sync_watermark = changes.get("watermark") or self.sync_watermark
             return True
         except Exception as e:
             return False
 
-    def create_new_task(self, name: str, description: str = None, due_date: str = None, tags: List[str] = None) -> Optional[Task]:
+    def apply_feed_changes(self, changes: dict) -> bool:
+        # Echoes of our own queued writes would briefly undo newer local edits
+        tasks = [
+            task_data for task_data in changes.get("tasks", [])
+            if not self.mutation_queue.has_pending(task_data["id"])
+        ]
+        return self.apply_changes({**changes, "tasks": tasks})
+
+    async def create_new_task_async(self, name: str, description: str = None, due_date: str = None, tags: List[str] = None) -> Optional[Task]:
+        # Only the server calls run on a worker thread; the index, lists and
+        # caches are changed here on the event loop, which the UI reads from
         try:
             due_date_iso = None
             if due_date:
@@ -54,14 +255,23 @@ class Controller:
                 "is_completed": False
             }
 
-            created_task_data = self.db_service.create_task(task_data)
+            created_task_data = await self.async_db_service.create_task(task_data)
             if not created_task_data:
                 return None
 
             task = Task(**created_task_data)
+            self.descriptions.put(task.id, task.description)
+            self._insert_task(task)
 
             if tags:
-                self._add_tags_to_task(task.id, tags)
+                tag_names = self._canonical_tag_names(tags)
+                tags_by_name = {tag.name: tag for tag in self.all_tags}
+                try:
+                    linked_tags = await asyncio.to_thread(self._resolve_and_link_tags, task.id, tag_names, tags_by_name)
+                except Exception as e:
+                    linked_tags = []
+                if self.get_task_by_id(task.id):
+                    self._set_task_tags(task.id, linked_tags)
 
             return task
         except Exception as e:
@@ -69,12 +279,18 @@ class Controller:
 
     def update_task(self, task_id: int, name: str = None, description: str = None, due_date: str = None, tags: List[str] = None) -> Optional[Task]:
         try:
+            task = self.get_task_by_id(task_id)
+            if not task:
+                return None
+
             updates = {}
 
             if name is not None:
                 updates['name'] = name
 
-            updates['description'] = description
+            # An empty field for a description that never loaded means "unchanged"
+            if task_id in self.descriptions or description:
+                updates['description'] = description
 
             if due_date:
                 if not DateTimeHelper.validate_date_format(due_date):
@@ -83,32 +299,54 @@ class Controller:
             else:
                 updates['due_date'] = None
 
-            updated_task_data = self.db_service.update_task(task_id, updates)
-            if not updated_task_data:
-                return None
-
-            task = Task(**updated_task_data)
-
-            self.db_service.remove_all_task_tags(task_id)
-            if tags:
-                self._add_tags_to_task(task_id, tags)
-                tags_data = self.db_service.get_tags_for_task(task_id)
-                self.task_tags_cache[task_id] = [
-                    Tag(id=tag['tag_id'], name=tag['tag_name'], user_id=tag['tag_user_id']) for tag in tags_data
-                ]
-            else:
-                self.task_tags_cache[task_id] = []
-
+            previous_values = {key: getattr(task, key) for key in updates}
+            if 'description' in updates:
+                previous_values['description'] = self.descriptions.peek(task_id)
+                self.descriptions.put(task_id, description)
+            previous_tags = self.index.get_tags(task_id)
+            tag_names = self._canonical_tag_names(tags or [])
+            tags_by_name = {tag.name: tag for tag in self.all_tags}
+
+            self._remove_task(task_id)
+            for key, value in updates.items():
+                setattr(task, key, value)
+            self._insert_task(task)
+            self.index.set_task_tags(task_id, [
+                tags_by_name.get(tag_name) or Tag(id=None, name=tag_name, user_id=self.user_id)
+                for tag_name in tag_names
+            ])
+
+            def rollback_tags():
+                if self.get_task_by_id(task_id):
+                    self.index.set_task_tags(task_id, previous_tags)
+
+            def on_success(linked_tags):
+                if self.get_task_by_id(task_id):
+                    self._set_task_tags(task_id, linked_tags)
+
+            self.mutation_queue.update_task(
+                task_id, updates, previous_values,
+                lambda values: self._restore_task_values(task_id, values),
+            )
+            if tag_names != [tag.name for tag in previous_tags]:
+                self.mutation_queue.replace_task_tags(task_id, tag_names, tags_by_name, rollback_tags, on_success)
             return task
         except Exception as e:
             return None
 
     def delete_task(self, task_id: int) -> bool:
         try:
-            success = self.db_service.delete_task(task_id)
-            if success and task_id in self.task_tags_cache:
-                del self.task_tags_cache[task_id]
-            return success
+            task = self._remove_task(task_id)
+            if not task:
+                return False
+            previous_tags = self.index.pop_task_tags(task_id)
+
+            def rollback():
+                self._insert_task(task)
+                self.index.set_task_tags(task_id, previous_tags)
+
+            self.mutation_queue.delete_task(task_id, rollback)
+            return True
         except Exception as e:
             return False
 
@@ -121,134 +359,229 @@ class Controller:
             new_status = not task.is_completed
             updates = {"is_completed": new_status}
 
-            updated_task_data = self.db_service.update_task(task_id, updates)
-            if updated_task_data:
-                return Task(**updated_task_data)
-            return None
+            self._remove_task(task_id)
+            task.is_completed = new_status
+            self._insert_task(task)
+
+            self.mutation_queue.update_task(
+                task_id, updates, {"is_completed": not new_status},
+                lambda values: self._restore_task_values(task_id, values),
+            )
+            return task
         except Exception as e:
             return None
 
     def search_tasks_by_tag_name(self, search_term: str) -> List[Task]:
         try:
-            search_results_data = self.db_service.get_tasks_by_tag_name(search_term)
-            search_results = [Task(id=task['task_id'], name=task['task_name'], description=task['task_description'], due_date=task['task_due_date'], is_completed=task['task_is_completed'], created_at=task['task_created_at'], user_id=task['task_user_id']) for task in search_results_data]
+            task_ids = set()
+            for tag in self.all_tags:
+                if tag.id is not None and TagSearchHelper.matches(tag.name, search_term):
+                    task_ids |= self.index.task_ids_with_tag(tag.id)
 
-            return search_results
+            search_results = [self.index.get_task(task_id) for task_id in task_ids]
+            return [task for task in search_results if task]
         except Exception as e:
             return []
 
-    def _add_tags_to_task(self, task_id: int, tag_names: List[str]) -> bool:
+    def search_tasks(self, query: str) -> List[Task]:
         try:
-            for tag_name in tag_names:
-                existing_tag_data = self.db_service.get_tag_by_name(tag_name)
-
-                if existing_tag_data:
-                    tag_id = existing_tag_data['id']
-                else:
-                    new_tag_data = self.db_service.create_tag(tag_name)
-                    if not new_tag_data:
-                        continue
-                    tag_id = new_tag_data['id']
-
-                self.db_service.link_task_tag(task_id, tag_id)
-
-            tags_data = self.db_service.get_tags_for_task(task_id)
-            self.task_tags_cache[task_id] = [
-                Tag(id=tag['tag_id'], name=tag['tag_name'], user_id=tag['tag_user_id']) for tag in tags_data
-            ]
-
-            return True
+            self._refresh_search_index()
+            search_results = [self.index.get_task(task_id) for task_id, _ in self.search_index.search(query)]
+            return [task for task in search_results if task]
         except Exception as e:
-            return False
+            return []
+
+    def _refresh_search_index(self):
+        changed_task_ids = self.index.take_changed_task_ids()
+        if changed_task_ids is None:
+            self.search_index.clear()
+            changed_task_ids = list(self.index.tasks_by_id)
+            stored = self.db_service.get_stored_descriptions()
+        else:
+            stored = self.db_service.get_stored_descriptions(list(changed_task_ids))
+        for task_id in changed_task_ids:
+            task = self.index.get_task(task_id)
+            if task:
+                # The cache also holds edits that have not reached the store yet
+                description = self.descriptions.peek(task_id) if task_id in self.descriptions else stored.get(task_id)
+                self.search_index.index_task(task, self.index.get_tags(task_id), description)
+            else:
+                self.search_index.remove_task(task_id)
+
+    def _canonical_tag_names(self, tag_names: List[str]) -> List[str]:
+        # Tag names are unique per user regardless of case: reuse the spelling
+        # of an existing tag and keep the first of any case-only duplicates
+        known = {tag.name.lower(): tag.name for tag in self.all_tags}
+        names = {}
+        for tag_name in tag_names:
+            names.setdefault(tag_name.lower(), known.get(tag_name.lower(), tag_name))
+        return list(names.values())
+
+    def _resolve_and_link_tags(self, task_id: int, tag_names: List[str], tags_by_name: dict) -> List[Tag]:
+        missing_names = [tag_name for tag_name in tag_names if tag_name not in tags_by_name]
+        if missing_names:
+            for tag_data in self.db_service.upsert_tags(missing_names):
+                tag = Tag(**tag_data)
+                tags_by_name[tag.name] = tag
+
+        tags = [tags_by_name[tag_name] for tag_name in tag_names if tag_name in tags_by_name]
+        if tags:
+            self.db_service.link_task_tags(task_id, [tag.id for tag in tags])
+        return tags
+
+    def _set_task_tags(self, task_id: int, tags: List[Tag]):
+        known_tag_ids = {tag.id for tag in self.all_tags}
+        for tag in tags:
+            if tag.id not in known_tag_ids:
+                self.all_tags.append(tag)
+                known_tag_ids.add(tag.id)
+        self.index.set_task_tags(task_id, tags)
+
+    def _restore_task_values(self, task_id: int, values: dict):
+        if 'description' in values:
+            self.descriptions.put(task_id, values['description'])
+        task = self._remove_task(task_id)
+        if task:
+            for key, value in values.items():
+                setattr(task, key, value)
+            self._insert_task(task)
+
+    def _insert_task(self, task: Task):
+        self.index.add_task(task)
+        if task.is_completed:
+            self.completed_tasks.add(task)
+        else:
+            self.pending_tasks.add(task)
+
+    def _remove_task(self, task_id: int) -> Optional[Task]:
+        task = self.index.discard_task(task_id)
+        if task:
+            task_list = self.completed_tasks if task.is_completed else self.pending_tasks
+            task_list.remove(task)
+        return task
 
     def get_all_tags(self) -> List[Tag]:
         return self.all_tags
 
     def count_completed_tasks_with_tag(self, tag: Tag) -> int:
-        count = 0
-        for p_task in self.completed_tasks:
-            p_task_tags = self.task_tags_cache.get(p_task.id, [])
-            if any(t.id == tag.id for t in p_task_tags):
-                count += 1
-        return count
+        if tag.id in self.tag_counts:
+            return self.tag_counts[tag.id]["completed_count"]
+        return self.index.count_completed_tasks_with_tag(tag.id)
 
     def count_tasks_with_tag(self, tag: Tag) -> int:
-        count = 0
-        for task_tags in self.task_tags_cache.values():
-            if any(t.id == tag.id for t in task_tags):
-                count += 1
-        return count
-
-    def create_new_tag(self, name: str, description: str = None) -> Optional[Tag]:
+        # The links only arrive at the end of a streamed load
+        if tag.id in self.tag_counts:
+            return self.tag_counts[tag.id]["task_count"]
+        return self.index.count_tasks_with_tag(tag.id)
+
+    def get_tasks_with_tag(self, tag: Tag) -> List[Task]:
+        tasks = [self.index.get_task(task_id) for task_id in self.index.task_ids_with_tag(tag.id)]
+        pending_tasks = [task for task in tasks if task and not task.is_completed]
+        completed_tasks = [task for task in tasks if task and task.is_completed]
+        return TaskSorter.sort_tasks_by_priority(pending_tasks) + TaskSorter.sort_tasks_by_priority(completed_tasks)
+
+    async def create_new_tag_async(self, name: str, description: str = None) -> Optional[Tag]:
         try:
-            if any(tag.name == name for tag in self.all_tags):
+            if any(tag.name.lower() == name.lower() for tag in self.all_tags):
                 raise ValueError(f"Tag '{name}' already exists")
 
             tag_data = {"name": name}
             if description:
                 tag_data["description"] = description
 
-            created_tag_data = self.db_service.create_tag_with_description(tag_data)
+            created_tag_data = await self.async_db_service.create_tag_with_description(tag_data)
             if not created_tag_data:
                 return None
 
-            self.load_all_tasks()
-
             created_tag = Tag(**created_tag_data)
+            self.all_tags.append(created_tag)
             return created_tag
         except Exception as e:
             return None
 
-    def update_tag(self, tag: Tag, name: str, description: str = None) -> Optional[Tag]:
+    async def update_tag_async(self, tag: Tag, name: str, description: str = None) -> Optional[Tag]:
         try:
             updates = {}
-            if any(t.tag_name == name and t.id != tag.id for t in self.all_tags):
+            if any(t.name.lower() == name.lower() and t.id != tag.id for t in self.all_tags):
                 raise ValueError(f"Tag '{name}' already exists")
 
             updates["name"] = name
             updates["description"] = description
 
-            updated_tag_data = self.db_service.update_tag(tag.id, updates)
+            updated_tag_data = await self.async_db_service.update_tag(tag.id, updates)
             if not updated_tag_data:
                 return None
 
-            self.load_all_tasks()
-
-            updated_tag = Tag(**updated_tag_data)
-            return updated_tag
+            for key, value in updated_tag_data.items():
+                if hasattr(tag, key):
+                    setattr(tag, key, value)
+            self.index.touch_tag(tag.id)
+            return tag
         except Exception as e:
             return None
 
-    def delete_tag(self, tag: Tag) -> bool:
+    async def delete_tag_async(self, tag: Tag) -> bool:
         try:
-            success = self.db_service.delete_tag(tag.id)
+            success = await self.async_db_service.delete_tag(tag.id)
             if not success:
                 return False
 
-            self.load_all_tasks()
-
-            for task_id in list(self.task_tags_cache.keys()):
-                self.task_tags_cache[task_id] = [t for t in self.task_tags_cache[task_id] if t.id != tag.id]
+            self.all_tags[:] = [t for t in self.all_tags if t.id != tag.id]
+            self.index.remove_tag(tag.id)
 
             return True
         except Exception as e:
             return False
 
     def get_task_by_id(self, task_id: int) -> Optional[Task]:
-        for task in self.pending_tasks + self.completed_tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self.index.get_task(task_id)
 
     def get_task_display_text(self, task: Task) -> str:
         return TaskDisplayHelper.get_task_display_text(task)
 
     def get_task_details_text(self, task: Task) -> str:
-        tags = self.task_tags_cache.get(task.id, [])
-        return TaskDisplayHelper.format_task_details(task, tags)
+        tags = self.index.get_tags(task.id)
+        loaded, description = self.descriptions.get(task.id)
+        return TaskDisplayHelper.format_task_details(task, tags, description if loaded else DESCRIPTION_LOADING)
+
+    def get_task_description(self, task_id: int) -> Optional[str]:
+        return self.descriptions.get(task_id)[1]
+
+    def has_task_description(self, task_id: int) -> bool:
+        return task_id in self.descriptions
+
+    def missing_description_ids(self, task_ids: List[int]) -> List[int]:
+        return self.descriptions.missing(task_ids)
+
+    def fetch_task_descriptions(self, task_ids: List[int]) -> dict:
+        # Blocking; run off the UI thread and hand the result to cache_task_descriptions.
+        # Before sign-in an anonymous request would see no rows, so only the
+        # local store is asked
+        try:
+            if not self.mutation_queue.is_ready:
+                return self.db_service.get_stored_descriptions(task_ids)
+            return self.db_service.get_task_descriptions(task_ids)
+        except Exception as e:
+            return {}
+
+    def cache_task_descriptions(self, descriptions: dict):
+        self.descriptions.update(descriptions)
+        for task_id in descriptions:
+            self.index.touch_task(task_id)
+
+    def fill_task_descriptions(self, after_id: int = 0) -> List[int]:
+        # Blocking; stores one batch of descriptions for search and returns the ids asked for
+        try:
+            return self.db_service.fill_descriptions(after_id)
+        except Exception as e:
+            return []
+
+    def index_task_descriptions(self, task_ids: List[int]):
+        for task_id in task_ids:
+            self.index.touch_task(task_id)
 
     def get_tags_for_task(self, task_id: int) -> List[Tag]:
-        return self.task_tags_cache.get(task_id, [])
+        return self.index.get_tags(task_id)
 
     def prepare_task_for_editing(self, task: Task) -> dict:
         tags = self.get_tags_for_task(task.id)
@@ -256,7 +589,7 @@ class Controller:
 
         return {
             'name': task.name,
-            'description': task.description or '',
+            'description': self.descriptions.peek(task.id) or '',
             'due_date': DateTimeHelper.convert_from_iso8601_jst(task.due_date) if task.due_date else '',
             'tags': ', '.join(tag_names)
         }
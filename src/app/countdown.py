@@ -0,0 +1,72 @@
+import heapq
+import math
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from .models import Task
+
+HOUR = 3600
+DAY = 24 * HOUR
+MONTH = 30 * DAY
+# Fire just after a boundary so the recomputed label has already changed
+BOUNDARY_SLACK = 1.0
+
+
+# When calculate_time_remaining() will next produce a different label
+def next_label_change(due_epoch: float, now: float) -> float:
+    remaining = due_epoch - now
+    if remaining >= 0:
+        if remaining > MONTH:
+            step = MONTH
+        elif remaining > DAY:
+            step = DAY
+        else:
+            step = HOUR
+        boundary = math.floor(remaining / step) * step
+        return due_epoch - boundary + BOUNDARY_SLACK
+
+    overdue = now - due_epoch
+    step = DAY if overdue >= DAY else HOUR
+    boundary = (math.floor(overdue / step) + 1) * step
+    return due_epoch + boundary + BOUNDARY_SLACK
+
+
+class CountdownScheduler:
+    def __init__(self):
+        self.heap: List[Tuple[float, int, str, float]] = []
+        self.due_dates: Dict[int, str] = {}
+
+    def sync(self, tasks: List[Task], now: float = None):
+        now = now or time.time()
+        due_dates = {}
+        for task in tasks:
+            if task.due_date and not task.is_completed:
+                due_dates[task.id] = task.due_date
+                if self.due_dates.get(task.id) != task.due_date and task.due_epoch is not None:
+                    self._push(task.id, task.due_date, task.due_epoch, now)
+        self.due_dates = due_dates
+
+        # Entries for removed or rescheduled tasks are skipped lazily; compact once they pile up
+        if len(self.heap) > 2 * len(self.due_dates) + 16:
+            self.heap = list({entry for entry in self.heap if self._is_current(entry)})
+            heapq.heapify(self.heap)
+
+    def _push(self, task_id: int, due_date: str, due_epoch: float, now: float):
+        heapq.heappush(self.heap, (next_label_change(due_epoch, now), task_id, due_date, due_epoch))
+
+    def _is_current(self, entry: Tuple[float, int, str, float]) -> bool:
+        return self.due_dates.get(entry[1]) == entry[2]
+
+    def next_deadline(self) -> Optional[float]:
+        while self.heap and not self._is_current(self.heap[0]):
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: float = None) -> Set[int]:
+        now = now or time.time()
+        changed_task_ids = set()
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            if self._is_current(entry):
+                changed_task_ids.add(entry[1])
+                self._push(entry[1], entry[2], entry[3], now)
+        return changed_task_ids
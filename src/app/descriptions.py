@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DESCRIPTION_CACHE_SIZE = 512
+# Rows on each side of the highlighted one whose descriptions are prefetched
+PREFETCH_RADIUS = 10
+DESCRIPTION_LOADING = "(loading...)"
+
+
+class DescriptionCache:
+    # LRU of task_id -> description; the list is hydrated without descriptions
+    def __init__(self, capacity: int = DESCRIPTION_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries: "OrderedDict[int, Optional[str]]" = OrderedDict()
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, task_id: int) -> Tuple[bool, Optional[str]]:
+        if task_id not in self.entries:
+            return False, None
+        self.entries.move_to_end(task_id)
+        return True, self.entries[task_id]
+
+    def peek(self, task_id: int) -> Optional[str]:
+        return self.entries.get(task_id)
+
+    def put(self, task_id: int, description: Optional[str]):
+        self.entries[task_id] = description
+        self.entries.move_to_end(task_id)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def update(self, descriptions: Dict[int, Optional[str]]):
+        for task_id, description in descriptions.items():
+            self.put(task_id, description)
+
+    def discard(self, task_id: int):
+        self.entries.pop(task_id, None)
+
+    def missing(self, task_ids: Iterable[int]) -> List[int]:
+        return [task_id for task_id in task_ids if task_id not in self.entries]
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,177 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 60.0
+SUBSCRIBE_TIMEOUT = 10.0
+
+
+# Row change -> the same shape DatabaseService.get_changes_since() returns
+def changes_from_event(table: str, event_type: str, record: Optional[Dict[str, Any]]) -> dict:
+    if not record:
+        return {}
+    if table == "tombstone_table":
+        return {"deleted": [record]}
+    if event_type == "DELETE":
+        # Deletions are picked up from the tombstone rows instead
+        return {}
+    if table == "task_table":
+        return {"tasks": [record]}
+    if table == "tag_table":
+        return {"tags": [record]}
+    if table == "task_tag_join_table":
+        return {"links": [{"task_id": record["task_id"], "tag_id": record["tag_id"]}]}
+    return {}
+
+
+class ChangeFeed(ABC):
+    # Keeps one subscription alive: connect, hand events to on_change, and
+    # reconnect with backoff when the link drops. on_connected fires after every
+    # (re)connect so the owner can catch up on whatever was missed.
+    def __init__(self, reconnect_delay: float = RECONNECT_DELAY, max_reconnect_delay: float = MAX_RECONNECT_DELAY):
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.on_change: Optional[Callable[[dict], None]] = None
+        self.on_connected: Optional[Callable[[], None]] = None
+        self.on_disconnected: Optional[Callable[[], None]] = None
+        self.connected = False
+        self.closed = False
+
+    @abstractmethod
+    async def connect(self):
+        ...
+
+    @abstractmethod
+    async def wait_disconnected(self):
+        ...
+
+    async def disconnect(self):
+        pass
+
+    def emit(self, table: str, event_type: str, record: Optional[Dict[str, Any]]):
+        if not self.connected or self.on_change is None:
+            return
+        changes = changes_from_event(table, event_type, record)
+        if changes:
+            self.on_change(changes)
+
+    async def run(self):
+        delay = self.reconnect_delay
+        try:
+            while not self.closed:
+                try:
+                    await self.connect()
+                    self.connected = True
+                    delay = self.reconnect_delay
+                    if self.on_connected:
+                        self.on_connected()
+                    await self.wait_disconnected()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    pass
+
+                was_connected = self.connected
+                self.connected = False
+                try:
+                    await self.disconnect()
+                except Exception:
+                    pass
+                if self.closed:
+                    break
+                if was_connected and self.on_disconnected:
+                    self.on_disconnected()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            self.connected = False
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+        await self.disconnect()
+
+
+class RealtimeChangeFeed(ChangeFeed):
+    # Supabase Realtime postgres_changes for one user's rows
+    def __init__(self, supabase, user_id: str, **kwargs):
+        super().__init__(**kwargs)
+        self.supabase = supabase
+        self.user_id = user_id
+        self.client = None
+        self.lost: Optional[asyncio.Event] = None
+
+    async def connect(self):
+        from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+        session = await asyncio.to_thread(self.supabase.auth.get_session)
+        self.client = AsyncRealtimeClient(f"{self.supabase.url}/realtime/v1", token=self.supabase.key, auto_reconnect=False)
+        await self.client.connect()
+        if session:
+            await self.client.set_auth(session.access_token)
+
+        channel = self.client.channel(f"tuido:{self.user_id}")
+        user_filter = f"user_id=eq.{self.user_id}"
+        for table in ("task_table", "tag_table", "tombstone_table"):
+            channel.on_postgres_changes("*", self._on_payload, table=table, filter=user_filter)
+        channel.on_postgres_changes("INSERT", self._on_payload, table="task_tag_join_table", filter=user_filter)
+
+        self.lost = asyncio.Event()
+        subscribed = asyncio.get_running_loop().create_future()
+
+        def on_state(state, error):
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                if not subscribed.done():
+                    subscribed.set_result(True)
+            elif not subscribed.done():
+                subscribed.set_exception(error or ConnectionError(state))
+            else:
+                self.lost.set()
+
+        await channel.subscribe(on_state)
+        await asyncio.wait_for(subscribed, SUBSCRIBE_TIMEOUT)
+
+    async def wait_disconnected(self):
+        # With auto_reconnect off the client only signals a dropped socket by
+        # its listener task finishing
+        lost = asyncio.ensure_future(self.lost.wait())
+        waiters = [lost]
+        if self.client._listen_task is not None:
+            waiters.append(self.client._listen_task)
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost.cancel()
+
+    async def disconnect(self):
+        client, self.client = self.client, None
+        if client is not None:
+            await client.close()
+
+    def _on_payload(self, payload: dict):
+        data = payload.get("data", payload)
+        self.emit(data.get("table"), data.get("type"), data.get("record"))
+
+
+class FakeChangeFeed(ChangeFeed):
+    # In-process event source for tests: push rows with emit(), cut the link
+    # with drop(), and refuse reconnects while available is False
+    def __init__(self, reconnect_delay: float = 0.01, **kwargs):
+        super().__init__(reconnect_delay=reconnect_delay, **kwargs)
+        self.available = True
+        self.connect_count = 0
+        self.dropped: Optional[asyncio.Event] = None
+
+    async def connect(self):
+        if not self.available:
+            raise ConnectionError("feed unavailable")
+        self.connect_count += 1
+        self.dropped = asyncio.Event()
+
+    async def wait_disconnected(self):
+        await self.dropped.wait()
+
+    def drop(self):
+        if self.dropped is not None:
+            self.dropped.set()
@@ -1,6 +1,9 @@
 import re
+import time
+from functools import lru_cache
+from typing import Optional
 from datetime import datetime, timezone, timedelta
-from .models import Task
+from .models import Task, parse_due_epoch
 
 class DateTimeHelper:
     JST_TZ = timezone(timedelta(hours=9))
@@ -36,36 +39,36 @@ class DateTimeHelper:
         if not due_date_str:
             return "-"
 
-        now = datetime.now(DateTimeHelper.JST_TZ)
-
-        try:
-            due_date = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
-            due_date_jst = due_date.astimezone(DateTimeHelper.JST_TZ)
-
-            remaining = due_date_jst - now
+        due_epoch = parse_due_epoch(due_date_str)
+        if due_epoch is None:
+            return "Invalid date"
+        return DateTimeHelper.format_time_remaining(due_epoch)
 
-            if remaining.total_seconds() < 0:
-                overdue = now - due_date_jst
-                days = overdue.days
-                hours = overdue.seconds // 3600
-                if days > 0:
-                    return f"({days}d over)"
-                else:
-                    return f"({hours}h over)"
+    @staticmethod
+    def format_time_remaining(due_epoch: float, now: float = None) -> str:
+        now = time.time() if now is None else now
+        remaining = due_epoch - now
+
+        if remaining < 0:
+            overdue = -remaining
+            days = int(overdue // 86400)
+            hours = int(overdue // 3600)
+            if days > 0:
+                return f"({days}d over)"
             else:
-                total_hours = remaining.total_seconds() / 3600
-                days = remaining.days
-
-                if total_hours <= 24:
-                    hours = int(total_hours)
-                    return f"({hours}h)"
-                elif days < 30:
-                    return f"({days}d)"
-                else:
-                    months = days // 30
-                    return f"({months}m)"
-        except Exception:
-            return "Invalid date"
+                return f"({hours}h over)"
+        else:
+            total_hours = remaining / 3600
+            days = int(remaining // 86400)
+
+            if total_hours <= 24:
+                hours = int(total_hours)
+                return f"({hours}h)"
+            elif days < 30:
+                return f"({days}d)"
+            else:
+                months = days // 30
+                return f"({months}m)"
 
     @staticmethod
     def convert_from_iso8601_jst(iso_date_str: str) -> str:
@@ -97,13 +100,16 @@ class TaskDisplayHelper:
             return task.display_name
         else:
             if task.due_date:
-                time_remaining = DateTimeHelper.calculate_time_remaining(task.due_date)
+                if task.due_epoch is None:
+                    time_remaining = "Invalid date"
+                else:
+                    time_remaining = DateTimeHelper.format_time_remaining(task.due_epoch)
                 return f"{time_remaining:>5} [b u]{task.display_name}[/b u]"
             else:
                 return f"( - ) [b u]{task.display_name}[/b u]"
 
     @staticmethod
-    def format_task_details(task: Task, tags: list) -> str:
+    def format_task_details(task: Task, tags: list, description: Optional[str] = None) -> str:
         details_text = "Task information:\n\n"
 
         details_text += f"  [b u]name[/b u]: {task.name}\n"
@@ -116,8 +122,8 @@ class TaskDisplayHelper:
             formatted_date = DateTimeHelper.convert_from_iso8601_jst(task.due_date)
             details_text += f"  [b u]due_date[/b u]: {formatted_date}\n"
 
-        if task.description:
-            details_text += f"  [b u]description[/b u]: {task.description or 'None'}\n"
+        if description:
+            details_text += f"  [b u]description[/b u]: {description}\n"
 
         if tags:
             details_text += "\nTags:\n"
@@ -128,25 +134,47 @@ class TaskDisplayHelper:
         return details_text
 
 
+class TagSearchHelper:
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def compile_ilike_pattern(search_term: str) -> re.Pattern:
+        # Same rules as PostgreSQL ILIKE: % and _ are wildcards, backslash escapes
+        parts = []
+        escaped = False
+        for char in search_term:
+            if escaped:
+                parts.append(re.escape(char))
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == "%":
+                parts.append(".*")
+            elif char == "_":
+                parts.append(".")
+            else:
+                parts.append(re.escape(char))
+        return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+    @staticmethod
+    def matches(tag_name: str, search_term: str) -> bool:
+        return TagSearchHelper.compile_ilike_pattern(search_term).fullmatch(tag_name) is not None
+
+
 class TaskSorter:
+    @staticmethod
+    def sort_key(task: Task, now: float) -> tuple:
+        due_epoch = task.due_epoch
+        if due_epoch is None:
+            # priority 3
+            return (3, task.id)
+        elif due_epoch < now:
+            # priority 2
+            return (2, -due_epoch, task.id)
+        else:
+            # priority 1
+            return (1, due_epoch, task.id)
+
     @staticmethod
     def sort_tasks_by_priority(tasks: list) -> list:
-        def sort_key(task):
-            if not task.due_date:
-                # priority 3
-                return (3, task.id)
-            else:
-                try:
-                    due_datetime = datetime.fromisoformat(task.due_date.replace('Z', '+00:00'))
-                    current_time = datetime.now(due_datetime.tzinfo)
-
-                    if due_datetime < current_time:
-                        # priority 2
-                        return (2, -due_datetime.timestamp(), task.id)
-                    else:
-                        # priority 1
-                        return (1, due_datetime.timestamp(), task.id)
-                except Exception:
-                    return (3, task.id)
-
-        return sorted(tasks, key=sort_key)
+        now = time.time()
+        return sorted(tasks, key=lambda task: TaskSorter.sort_key(task, now))
@@ -0,0 +1,228 @@
+import time
+from bisect import bisect_left
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set
+from .models import Task, Tag
+
+class TaskIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.tasks_by_id: Dict[int, Task] = {}
+        self.tags_by_task: Dict[int, List[Tag]] = {}
+        self.task_ids_by_tag: Dict[int, Set[int]] = {}
+        self.pending_ids: Set[int] = set()
+        self.completed_ids: Set[int] = set()
+        self.completed_count_by_tag: Dict[int, int] = {}
+        # None means every task changed (e.g. after a full reload)
+        self.changed_task_ids: Optional[Set[int]] = None
+
+    def _mark_changed(self, task_id: int):
+        if self.changed_task_ids is not None:
+            self.changed_task_ids.add(task_id)
+
+    def take_changed_task_ids(self) -> Optional[Set[int]]:
+        changed_task_ids = self.changed_task_ids
+        self.changed_task_ids = set()
+        return changed_task_ids
+
+    def touch_task(self, task_id: int):
+        self._mark_changed(task_id)
+
+    def touch_tag(self, tag_id: int):
+        for task_id in self.task_ids_with_tag(tag_id):
+            self._mark_changed(task_id)
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        return self.tasks_by_id.get(task_id)
+
+    def add_task(self, task: Task):
+        self._unset_status(task.id)
+        self._mark_changed(task.id)
+        self.tasks_by_id[task.id] = task
+        if task.is_completed:
+            self.completed_ids.add(task.id)
+            self._count_completed(task.id, 1)
+        else:
+            self.pending_ids.add(task.id)
+
+    def discard_task(self, task_id: int) -> Optional[Task]:
+        self._unset_status(task_id)
+        self._mark_changed(task_id)
+        return self.tasks_by_id.pop(task_id, None)
+
+    def _unset_status(self, task_id: int):
+        if task_id in self.completed_ids:
+            self.completed_ids.discard(task_id)
+            self._count_completed(task_id, -1)
+        self.pending_ids.discard(task_id)
+
+    def _count_completed(self, task_id: int, delta: int):
+        for tag in self.tags_by_task.get(task_id, []):
+            if tag.id is not None:
+                self.completed_count_by_tag[tag.id] = self.completed_count_by_tag.get(tag.id, 0) + delta
+
+    def get_tags(self, task_id: int) -> List[Tag]:
+        return self.tags_by_task.get(task_id, [])
+
+    def set_task_tags(self, task_id: int, tags: List[Tag]):
+        self.pop_task_tags(task_id)
+        for tag in tags:
+            self._link(task_id, tag)
+        self.tags_by_task[task_id] = list(tags)
+        self._mark_changed(task_id)
+
+    def pop_task_tags(self, task_id: int) -> List[Tag]:
+        tags = self.tags_by_task.pop(task_id, [])
+        for tag in tags:
+            self._unlink(task_id, tag.id)
+        self._mark_changed(task_id)
+        return tags
+
+    def add_task_tag(self, task_id: int, tag: Tag):
+        task_tags = self.tags_by_task.setdefault(task_id, [])
+        if all(t.id != tag.id for t in task_tags):
+            task_tags.append(tag)
+            self._link(task_id, tag)
+            self._mark_changed(task_id)
+
+    def remove_task_tag(self, task_id: int, tag_id: int):
+        task_tags = self.tags_by_task.get(task_id)
+        if task_tags is not None and any(tag.id == tag_id for tag in task_tags):
+            self.tags_by_task[task_id] = [tag for tag in task_tags if tag.id != tag_id]
+            self._unlink(task_id, tag_id)
+            self._mark_changed(task_id)
+
+    def remove_tag(self, tag_id: int):
+        for task_id in self.task_ids_by_tag.pop(tag_id, set()):
+            self.tags_by_task[task_id] = [tag for tag in self.tags_by_task.get(task_id, []) if tag.id != tag_id]
+            self._mark_changed(task_id)
+        self.completed_count_by_tag.pop(tag_id, None)
+
+    def _link(self, task_id: int, tag: Tag):
+        if tag.id is None:
+            return
+        self.task_ids_by_tag.setdefault(tag.id, set()).add(task_id)
+        if task_id in self.completed_ids:
+            self.completed_count_by_tag[tag.id] = self.completed_count_by_tag.get(tag.id, 0) + 1
+
+    def _unlink(self, task_id: int, tag_id: Optional[int]):
+        task_ids = self.task_ids_by_tag.get(tag_id)
+        if task_ids is None or task_id not in task_ids:
+            return
+        task_ids.discard(task_id)
+        if task_id in self.completed_ids:
+            self.completed_count_by_tag[tag_id] -= 1
+
+    def task_ids_with_tag(self, tag_id: int) -> Set[int]:
+        return self.task_ids_by_tag.get(tag_id, set())
+
+    def count_tasks_with_tag(self, tag_id: int) -> int:
+        return len(self.task_ids_with_tag(tag_id))
+
+    def count_completed_tasks_with_tag(self, tag_id: int) -> int:
+        return self.completed_count_by_tag.get(tag_id, 0)
+
+
+class SortedTaskList:
+    # Tasks in TaskSorter order, kept as three bisect-sorted partitions:
+    # upcoming (soonest first), overdue (most recent first) and undated (by id)
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self.partitions: List[List[Task]] = [[], [], []]
+        self.partition_keys: List[List[tuple]] = [[], [], []]
+        self.task_keys: Dict[int, tuple] = {}
+        self.split_time = time.time()
+
+        keyed_tasks = sorted((self._sort_key(task), task) for task in tasks)
+        for key, task in keyed_tasks:
+            self.partitions[key[0] - 1].append(task)
+            self.partition_keys[key[0] - 1].append(key)
+            self.task_keys[task.id] = key
+
+    def _sort_key(self, task: Task) -> tuple:
+        due_epoch = task.due_epoch
+        if due_epoch is None:
+            return (3, task.id)
+        elif due_epoch < self.split_time:
+            return (2, -due_epoch, task.id)
+        else:
+            return (1, due_epoch, task.id)
+
+    def rebalance(self, now: float = None) -> bool:
+        # Move upcoming tasks whose due time has passed to the front of overdue
+        self.split_time = time.time() if now is None else now
+        upcoming_keys = self.partition_keys[0]
+        count = bisect_left(upcoming_keys, (1, self.split_time))
+        if not count:
+            return False
+
+        moved_tasks = self.partitions[0][:count]
+        del self.partitions[0][:count]
+        del upcoming_keys[:count]
+        # Their due times are all after any task already overdue, so the moved
+        # block sorts ahead of the partition as a whole
+        keyed_tasks = sorted(((2, -task.due_epoch, task.id), task) for task in moved_tasks)
+        for key, task in keyed_tasks:
+            self.task_keys[task.id] = key
+        self.partitions[1][:0] = [task for _, task in keyed_tasks]
+        self.partition_keys[1][:0] = [key for key, _ in keyed_tasks]
+        return True
+
+    def add(self, task: Task):
+        self.rebalance()
+        key = self._sort_key(task)
+        keys = self.partition_keys[key[0] - 1]
+        position = bisect_left(keys, key)
+        keys.insert(position, key)
+        self.partitions[key[0] - 1].insert(position, task)
+        self.task_keys[task.id] = key
+
+    def extend(self, tasks: Iterable[Task]):
+        # Merge a batch with one sort per partition instead of an insert per task
+        self.rebalance()
+        batches: Dict[int, List[tuple]] = {}
+        for task in tasks:
+            key = self._sort_key(task)
+            batches.setdefault(key[0] - 1, []).append((key, task))
+            self.task_keys[task.id] = key
+        for partition, keyed_tasks in batches.items():
+            keyed_tasks += zip(self.partition_keys[partition], self.partitions[partition])
+            keyed_tasks.sort(key=lambda item: item[0])
+            self.partition_keys[partition] = [key for key, _ in keyed_tasks]
+            self.partitions[partition] = [task for _, task in keyed_tasks]
+
+    def remove(self, task: Task) -> bool:
+        key = self.task_keys.pop(task.id, None)
+        if key is None:
+            return False
+        keys = self.partition_keys[key[0] - 1]
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+            del self.partitions[key[0] - 1][position]
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return sum(len(partition) for partition in self.partitions)
+
+    def __iter__(self):
+        return chain(*self.partitions)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return list(self)[position]
+        if position < 0:
+            position += len(self)
+        for partition in self.partitions:
+            if position < len(partition):
+                return partition[position]
+            position -= len(partition)
+        raise IndexError("task index out of range")
+
+    def __add__(self, other) -> List[Task]:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> List[Task]:
+        return list(other) + list(self)
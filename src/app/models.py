@@ -1,7 +1,22 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional
 
-@dataclass
+def parse_due_epoch(due_date: Optional[str]) -> Optional[int]:
+    if not due_date:
+        return None
+    try:
+        return int(datetime.fromisoformat(due_date.replace('Z', '+00:00')).timestamp())
+    except Exception:
+        return None
+
+
+def intern_text(text: Optional[str]) -> Optional[str]:
+    return sys.intern(text) if text else text
+
+
+@dataclass(slots=True)
 class Task:
     id: int
     name: str
@@ -10,15 +25,38 @@ class Task:
     due_date: Optional[str] = None
     is_completed: bool = False
     created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    _parsed_due_date: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _due_epoch: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.user_id = intern_text(self.user_id)
+        self._parse_due_date()
+
+    def _parse_due_date(self):
+        self._due_epoch = parse_due_epoch(self.due_date)
+        self._parsed_due_date = self.due_date
+
+    @property
+    def due_epoch(self) -> Optional[int]:
+        # Re-parsed only when due_date has been reassigned since the last parse
+        if self._parsed_due_date != self.due_date:
+            self._parse_due_date()
+        return self._due_epoch
 
     @property
     def display_name(self) -> str:
         return self.name or 'Untitled'
 
 
-@dataclass
+@dataclass(slots=True)
 class Tag:
     id: int
     name: str
     user_id: str
     description: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    def __post_init__(self):
+        self.name = intern_text(self.name)
+        self.user_id = intern_text(self.user_id)
@@ -0,0 +1,260 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+from .models import Tag
+
+FLUSH_DELAY = 0.5
+
+@dataclass
+class PendingUpdate:
+    updates: Dict[str, Any]
+    base_values: Dict[str, Any]
+    rollback: Callable[[Dict[str, Any]], None]
+
+
+@dataclass
+class PendingTags:
+    tag_names: List[str]
+    tags_by_name: Dict[str, Any]
+    rollback: Callable[[], None]
+    on_success: Optional[Callable[[List[Any]], None]] = None
+
+
+@dataclass
+class PendingDelete:
+    rollbacks: List[Callable[[], None]] = field(default_factory=list)
+
+
+class MutationQueue:
+    def __init__(self, db_service, flush_delay: float = FLUSH_DELAY):
+        self.db_service = db_service
+        self.flush_delay = flush_delay
+        self.task_updates: Dict[int, PendingUpdate] = {}
+        self.task_tags: Dict[int, PendingTags] = {}
+        self.task_deletes: Dict[int, PendingDelete] = {}
+        self.on_rollback: Optional[Callable[[], None]] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.flush_lock: Optional[asyncio.Lock] = None
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.ready: Optional[asyncio.Event] = None
+        self.in_flight_ids: Set[int] = set()
+
+    def start(self, ready: bool = True):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.flush_lock = asyncio.Lock()
+            self.ready = asyncio.Event()
+        if ready:
+            self.ready.set()
+
+    def set_ready(self):
+        # Writes queued before sign-in are held until the session exists
+        if self.ready is not None:
+            self.ready.set()
+            if self.pending_count:
+                self._schedule_flush()
+
+    def discard_pending(self):
+        # Without a session the held writes can never be sent; undo them
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.pending_count:
+            self._finish(self._failed_results(self._take_batch()))
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready is None or self.ready.is_set()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self.task_updates) + len(self.task_tags) + len(self.task_deletes)
+
+    def has_pending(self, task_id: int) -> bool:
+        return (
+            task_id in self.task_updates or task_id in self.task_tags
+            or task_id in self.task_deletes or task_id in self.in_flight_ids
+        )
+
+    def update_task(self, task_id: int, updates: Dict[str, Any], previous_values: Dict[str, Any], rollback: Callable[[Dict[str, Any]], None]):
+        pending = self.task_updates.get(task_id)
+        if pending is None:
+            pending = PendingUpdate({}, {}, rollback)
+            self.task_updates[task_id] = pending
+
+        for key, value in updates.items():
+            pending.base_values.setdefault(key, previous_values.get(key))
+            pending.updates[key] = value
+
+        if pending.updates == pending.base_values:
+            del self.task_updates[task_id]
+        self._schedule_flush()
+
+    def replace_task_tags(self, task_id: int, tag_names: List[str], tags_by_name: Dict[str, Any], rollback: Callable[[], None], on_success: Callable[[List[Any]], None] = None):
+        pending = self.task_tags.get(task_id)
+        if pending is None:
+            self.task_tags[task_id] = PendingTags(tag_names, tags_by_name, rollback, on_success)
+        else:
+            pending.tag_names = tag_names
+            pending.tags_by_name.update(tags_by_name)
+            pending.on_success = on_success
+        self._schedule_flush()
+
+    def delete_task(self, task_id: int, rollback: Callable[[], None]):
+        pending = PendingDelete([rollback])
+        pending_update = self.task_updates.pop(task_id, None)
+        if pending_update:
+            pending.rollbacks.append(lambda: pending_update.rollback(pending_update.base_values))
+        pending_tags = self.task_tags.pop(task_id, None)
+        if pending_tags:
+            pending.rollbacks.append(pending_tags.rollback)
+        self.task_deletes[task_id] = pending
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.loop is None:
+            self._finish(self._write_batch(self._take_batch()))
+        elif self.flush_handle is None:
+            self.flush_handle = self.loop.call_later(self.flush_delay, self._flush_soon)
+
+    def _flush_soon(self):
+        self.flush_handle = None
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.flush_lock is None or not self.ready.is_set():
+            # set_ready() flushes whatever is held once the session exists
+            return
+
+        async with self.flush_lock:
+            while self.pending_count:
+                batch = self._take_batch()
+                self.in_flight_ids = {task_id for entries in batch.values() for task_id in entries}
+                try:
+                    results = await asyncio.to_thread(self._write_batch, batch)
+                except Exception:
+                    results = self._failed_results(batch)
+                finally:
+                    self.in_flight_ids = set()
+                self._finish(results)
+
+    def _take_batch(self) -> dict:
+        batch = {
+            "updates": self.task_updates,
+            "tags": self.task_tags,
+            "deletes": self.task_deletes,
+        }
+        self.task_updates = {}
+        self.task_tags = {}
+        self.task_deletes = {}
+        return batch
+
+    def _write_batch(self, batch: dict) -> dict:
+        results = {"batch": batch, "failed_updates": [], "failed_tags": [], "failed_deletes": [], "linked_tags": {}}
+
+        update_groups = {}
+        for task_id, pending in batch["updates"].items():
+            group_key = tuple(sorted(pending.updates.items()))
+            update_groups.setdefault(group_key, []).append(task_id)
+        for group_key, task_ids in update_groups.items():
+            try:
+                if not self.db_service.update_tasks(task_ids, dict(group_key)):
+                    results["failed_updates"] += task_ids
+            except Exception:
+                results["failed_updates"] += task_ids
+
+        if batch["deletes"]:
+            task_ids = list(batch["deletes"])
+            try:
+                if not self.db_service.delete_tasks(task_ids):
+                    results["failed_deletes"] += task_ids
+            except Exception:
+                results["failed_deletes"] += task_ids
+
+        failed_update_ids = set(results["failed_updates"])
+        tag_entries = {
+            task_id: pending for task_id, pending in batch["tags"].items()
+            if task_id not in failed_update_ids
+        }
+        results["failed_tags"] += [task_id for task_id in batch["tags"] if task_id not in tag_entries]
+        if tag_entries:
+            try:
+                results["linked_tags"] = self._write_task_tags(tag_entries)
+            except Exception:
+                results["failed_tags"] += list(tag_entries)
+
+        return results
+
+    def _write_task_tags(self, tag_entries: Dict[int, PendingTags]) -> Dict[int, List[Any]]:
+        tags_by_name = {}
+        for pending in tag_entries.values():
+            tags_by_name.update(
+                {name: tag for name, tag in pending.tags_by_name.items() if tag.id is not None}
+            )
+
+        # Tag names are unique per user regardless of case, and edits of
+        # different tasks may spell the same new tag differently
+        tags_by_key = {tag_name.lower(): tag for tag_name, tag in tags_by_name.items()}
+        missing_names = {}
+        for pending in tag_entries.values():
+            for tag_name in pending.tag_names:
+                if tag_name.lower() not in tags_by_key:
+                    missing_names.setdefault(tag_name.lower(), tag_name)
+        if missing_names:
+            for tag_data in self.db_service.upsert_tags(list(missing_names.values())):
+                tag = Tag(**tag_data)
+                tags_by_key[tag.name.lower()] = tag
+
+        linked_tags = {
+            task_id: [tags_by_key[tag_name.lower()] for tag_name in pending.tag_names if tag_name.lower() in tags_by_key]
+            for task_id, pending in tag_entries.items()
+        }
+        links = [
+            {"task_id": task_id, "tag_id": tag.id}
+            for task_id, tags in linked_tags.items() for tag in tags
+        ]
+        # New links go in before the old ones come out, so a failure between
+        # the two requests leaves a task with extra tags rather than none
+        if links:
+            self.db_service.upsert_links(links)
+        self.db_service.remove_other_tags(
+            {task_id: [tag.id for tag in tags] for task_id, tags in linked_tags.items()}
+        )
+        return linked_tags
+
+    def _failed_results(self, batch: dict) -> dict:
+        return {
+            "batch": batch,
+            "failed_updates": list(batch["updates"]),
+            "failed_tags": list(batch["tags"]),
+            "failed_deletes": list(batch["deletes"]),
+            "linked_tags": {},
+        }
+
+    def _finish(self, results: dict):
+        batch = results["batch"]
+        failed = False
+        try:
+            for task_id in results["failed_deletes"]:
+                for rollback in batch["deletes"][task_id].rollbacks:
+                    rollback()
+                failed = True
+            for task_id in results["failed_updates"]:
+                pending = batch["updates"][task_id]
+                pending.rollback(pending.base_values)
+                failed = True
+            for task_id in results["failed_tags"]:
+                batch["tags"][task_id].rollback()
+                failed = True
+            for task_id, tags in results["linked_tags"].items():
+                on_success = batch["tags"][task_id].on_success
+                if on_success:
+                    on_success(tags)
+        except Exception:
+            failed = True
+
+        if failed and self.on_rollback:
+            self.on_rollback()
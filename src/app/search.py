@@ -0,0 +1,96 @@
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+from .models import Task, Tag
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "description": 1.0,
+}
+EXACT_MATCH_BONUS = 1.5
+
+
+def tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.postings: Dict[str, Dict[int, float]] = {}
+        # Sorted vocabulary for prefix lookups; rebuilt lazily after a bulk load
+        self.terms: Optional[List[str]] = None
+        self.task_terms: Dict[int, Set[str]] = {}
+
+    def index_task(self, task: Task, tags: List[Tag], description: Optional[str] = None):
+        self.remove_task(task.id)
+
+        weights: Dict[str, float] = {}
+        fields = {
+            "name": task.name,
+            "description": description,
+            "tags": " ".join(tag.name for tag in tags if tag.name),
+        }
+        for field, text in fields.items():
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + FIELD_WEIGHTS[field]
+
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = {}
+                self.postings[term] = posting
+                if self.terms is not None:
+                    insort(self.terms, term)
+            posting[task.id] = weight
+        self.task_terms[task.id] = set(weights)
+
+    def remove_task(self, task_id: int):
+        for term in self.task_terms.pop(task_id, set()):
+            posting = self.postings[term]
+            posting.pop(task_id, None)
+            if not posting:
+                del self.postings[term]
+                if self.terms is not None:
+                    del self.terms[bisect_left(self.terms, term)]
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self.terms is None:
+            self.terms = sorted(self.postings)
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + "\U0010ffff")
+        return self.terms[start:end]
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms:
+            return []
+
+        scores: Dict[int, float] = {}
+        for position, query_term in enumerate(query_terms):
+            term_scores: Dict[int, float] = {}
+            for term in self._expand_prefix(query_term):
+                bonus = EXACT_MATCH_BONUS if term == query_term else 1.0
+                for task_id, weight in self.postings[term].items():
+                    score = weight * bonus
+                    if score > term_scores.get(task_id, 0.0):
+                        term_scores[task_id] = score
+
+            if position == 0:
+                scores = term_scores
+            else:
+                scores = {
+                    task_id: score + term_scores[task_id]
+                    for task_id, score in scores.items() if task_id in term_scores
+                }
+            if not scores:
+                return []
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
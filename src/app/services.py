@@ -1,18 +1,78 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
+from .stores import LocalStore
+
+PAGE_SIZE = 1000
+# Descriptions fetched per round trip when filling the local store in the background
+DESCRIPTION_FILL_BATCH = 200
+# Everything the task lists need; descriptions are fetched on demand
+TASK_LIST_COLUMNS = "id, name, user_id, created_at, due_date, is_completed, updated_at"
+# PostgREST count method for totals: "exact", or "estimated"/"planned" to trade
+# accuracy for speed on very large tables
+COUNT_METHOD = "exact"
+
+def latest_timestamp(timestamps: List[Optional[str]]) -> Optional[str]:
+    parsed = [
+        datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        for timestamp in timestamps if timestamp
+    ]
+    if not parsed:
+        return None
+    return max(parsed).isoformat()
 
 class DatabaseService:
-    def __init__(self, supabase, user_id: str = ""):
+    def __init__(self, supabase, user_id: str = "", page_size: int = PAGE_SIZE):
         self.supabase = supabase
         self.user_id = user_id
+        self.page_size = page_size
 
     def get_all_tasks(self) -> List[Dict[str, Any]]:
-        response = (
-            self.supabase.table("task_table")
-            .select("*")
+        return self._fetch_all_pages(
+            lambda: self.supabase.table("task_table")
+            .select(TASK_LIST_COLUMNS)
             .eq("user_id", self.user_id)
-            .execute()
+            .order("id")
         )
-        return response.data or []
+
+    def stream_all(self) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        # One get_task_snapshot call per page; each task carries its tag ids, so
+        # the join table and the tag list never need their own round trips.
+        # Tags and their counts follow the first page; links come last. "now" is
+        # pinned so a task cannot change group, and page, while the stream runs.
+        now = datetime.now(timezone.utc).isoformat()
+        links, after = [], None
+        while True:
+            snapshot = self.get_task_snapshot(now, after, self.page_size)
+            tasks = snapshot.get("tasks") or []
+            for task in tasks:
+                links.extend({"task_id": task["id"], "tag_id": tag_id} for tag_id in task.pop("tag_ids", None) or [])
+            if tasks:
+                yield "tasks", tasks
+            if after is None:
+                tags = snapshot.get("tags") or []
+                yield "tags", [
+                    {key: value for key, value in tag.items() if key not in ("task_count", "completed_count")}
+                    for tag in tags
+                ]
+                yield "tag_counts", [
+                    {"tag_id": tag["id"], "task_count": tag.get("task_count", 0), "completed_count": tag.get("completed_count", 0)}
+                    for tag in tags
+                ]
+            if len(tasks) < self.page_size:
+                break
+            after = snapshot.get("next")
+        yield "links", links
+
+    def get_task_snapshot(self, now: str, after: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        # Tasks in TODO-list order with their tag ids, starting after the
+        # "next" cursor of the previous page; the first page also lists every
+        # tag with its task_count and completed_count
+        params = {"p_now": now, "p_after": after}
+        if limit is not None:
+            params["p_limit"] = limit
+        response = self.supabase.rpc("get_task_snapshot", params).execute()
+        return response.data or {}
 
     def create_task(self, task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         task_data["user_id"] = self.user_id
@@ -32,6 +92,16 @@ class DatabaseService:
         )
         return response.data[0] if response.data else None
 
+    def update_tasks(self, task_ids: List[int], updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        response = (
+            self.supabase.table("task_table")
+            .update(updates)
+            .in_("id", task_ids)
+            .eq("user_id", self.user_id)
+            .execute()
+        )
+        return response.data or []
+
     def delete_task(self, task_id: int) -> bool:
         response = (
             self.supabase.table("task_table")
@@ -42,27 +112,122 @@ class DatabaseService:
         )
         return bool(response.data)
 
-    def get_tasks_by_tag_name(self, search_term: str) -> List[Dict[str, Any]]:
+    def delete_tasks(self, task_ids: List[int]) -> bool:
         response = (
-            self.supabase.table("task_tag_view")
-            .select("*")
-            .eq("task_user_id", self.user_id)
-            .eq("tag_user_id", self.user_id)
-            .ilike("tag_name", search_term)
+            self.supabase.table("task_table")
+            .delete()
+            .in_("id", task_ids)
+            .eq("user_id", self.user_id)
             .execute()
         )
-        return response.data or []
+        return bool(response.data)
 
-    def get_tags_for_task(self, task_id: int) -> List[Dict[str, Any]]:
+    def get_task_descriptions(self, task_ids: List[int]) -> Dict[int, Optional[str]]:
         response = (
-            self.supabase.table("task_tag_view")
+            self.supabase.table("task_table")
+            .select("id, description")
+            .in_("id", task_ids)
+            .eq("user_id", self.user_id)
+            .execute()
+        )
+        # Ids the server did not return (deleted, or not visible yet) are left
+        # out rather than reported as empty
+        return {row["id"]: row.get("description") for row in response.data or []}
+
+    def get_stored_descriptions(self, task_ids: Optional[List[int]] = None) -> Dict[int, Optional[str]]:
+        return {}
+
+    def fill_descriptions(self, after_id: int = 0, limit: int = DESCRIPTION_FILL_BATCH) -> List[int]:
+        return []
+
+    def count_tasks(self, is_completed: Optional[bool] = None, count: str = COUNT_METHOD) -> Optional[int]:
+        # head=True sends a HEAD request: PostgREST returns only the total
+        query = (
+            self.supabase.table("task_table")
+            .select("id", count=count, head=True)
+            .eq("user_id", self.user_id)
+        )
+        if is_completed is not None:
+            query = query.eq("is_completed", is_completed)
+        return query.execute().count
+
+    def count_tags(self, count: str = COUNT_METHOD) -> Optional[int]:
+        response = (
+            self.supabase.table("tag_table")
+            .select("id", count=count, head=True)
+            .eq("user_id", self.user_id)
+            .execute()
+        )
+        return response.count
+
+    def _fetch_all_pages(self, build_query) -> List[Dict[str, Any]]:
+        return [row for page in self._iter_pages(build_query) for row in page]
+
+    def _iter_pages(self, build_query) -> Iterator[List[Dict[str, Any]]]:
+        start = 0
+        while True:
+            response = build_query().range(start, start + self.page_size - 1).execute()
+            page = response.data or []
+            if page:
+                yield page
+            if len(page) < self.page_size:
+                return
+            start += self.page_size
+
+    def get_all_task_tags(self) -> List[Dict[str, Any]]:
+        return self._fetch_all_pages(
+            lambda: self.supabase.table("task_tag_view")
+            .select("task_id, tag_id")
+            .eq("task_user_id", self.user_id)
+            .eq("tag_user_id", self.user_id)
+            .order("task_id")
+            .order("tag_id")
+        )
+
+    def get_changes_since(self, since: str) -> Dict[str, Any]:
+        tasks = self._fetch_all_pages(
+            lambda: self.supabase.table("task_table")
+            .select(TASK_LIST_COLUMNS)
+            .eq("user_id", self.user_id)
+            .gte("updated_at", since)
+            .order("id")
+        )
+        tags = self._fetch_all_pages(
+            lambda: self.supabase.table("tag_table")
             .select("*")
-            .eq("task_id", task_id)
+            .eq("user_id", self.user_id)
+            .gte("updated_at", since)
+            .order("id")
+        )
+        links = self._fetch_all_pages(
+            lambda: self.supabase.table("task_tag_view")
+            .select("task_id, tag_id, link_updated_at")
             .eq("task_user_id", self.user_id)
             .eq("tag_user_id", self.user_id)
-            .execute()
+            .gte("link_updated_at", since)
+            .order("task_id")
+            .order("tag_id")
+        )
+        deleted = self._fetch_all_pages(
+            lambda: self.supabase.table("tombstone_table")
+            .select("table_name, row_id, tag_id, deleted_at")
+            .eq("user_id", self.user_id)
+            .gte("deleted_at", since)
+            .order("id")
         )
-        return response.data or []
+
+        timestamps = [since]
+        timestamps += [row["updated_at"] for row in tasks + tags if row.get("updated_at")]
+        timestamps += [row["link_updated_at"] for row in links if row.get("link_updated_at")]
+        timestamps += [row["deleted_at"] for row in deleted if row.get("deleted_at")]
+
+        return {
+            "tasks": tasks,
+            "tags": tags,
+            "links": [{"task_id": row["task_id"], "tag_id": row["tag_id"]} for row in links],
+            "deleted": deleted,
+            "watermark": latest_timestamp(timestamps),
+        }
 
     def get_tag_by_name(self, tag_name: str) -> Optional[Dict[str, Any]]:
         response = (
@@ -91,6 +256,17 @@ class DatabaseService:
         )
         return response.data[0] if response.data else None
 
+    def upsert_tags(self, tag_names: List[str]) -> List[Dict[str, Any]]:
+        response = (
+            self.supabase.table("tag_table")
+            .upsert(
+                [{"name": tag_name, "user_id": self.user_id} for tag_name in tag_names],
+                on_conflict="user_id,name",
+            )
+            .execute()
+        )
+        return response.data or []
+
     def link_task_tag(self, task_id: int, tag_id: int) -> bool:
         response = (
             self.supabase.table("task_tag_join_table")
@@ -99,6 +275,41 @@ class DatabaseService:
         )
         return bool(response.data)
 
+    def link_task_tags(self, task_id: int, tag_ids: List[int]) -> bool:
+        return self.link_tags([{"task_id": task_id, "tag_id": tag_id} for tag_id in tag_ids])
+
+    def link_tags(self, links: List[Dict[str, Any]]) -> bool:
+        response = (
+            self.supabase.table("task_tag_join_table")
+            .insert(links)
+            .execute()
+        )
+        return bool(response.data)
+
+    def upsert_links(self, links: List[Dict[str, Any]]) -> bool:
+        # Links that already exist are left alone
+        (
+            self.supabase.table("task_tag_join_table")
+            .upsert(links, on_conflict="task_id,tag_id", ignore_duplicates=True)
+            .execute()
+        )
+        return True
+
+    def remove_other_tags(self, tag_ids_by_task: Dict[int, List[int]]) -> bool:
+        # One request for every task: drop each task's links except the listed tags
+        filters = [
+            f"and(task_id.eq.{task_id},tag_id.not.in.({','.join(str(tag_id) for tag_id in tag_ids)}))"
+            if tag_ids else f"task_id.eq.{task_id}"
+            for task_id, tag_ids in tag_ids_by_task.items()
+        ]
+        (
+            self.supabase.table("task_tag_join_table")
+            .delete()
+            .or_(",".join(filters))
+            .execute()
+        )
+        return True
+
     def remove_all_task_tags(self, task_id: int) -> bool:
         response = (
             self.supabase.table("task_tag_join_table")
@@ -135,3 +346,190 @@ class DatabaseService:
             .execute()
         )
         return True
+
+    def sync(self, since: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if not since:
+            return None
+        return self.get_changes_since(since)
+
+
+class LocalDatabaseService(DatabaseService):
+    def __init__(self, supabase, user_id: str = "", store: LocalStore = None, page_size: int = PAGE_SIZE):
+        super().__init__(supabase, user_id, page_size)
+        self.store = store or LocalStore(user_id)
+
+    def sync(self, since: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        watermark = self.store.get_state("watermark")
+        if watermark:
+            changes = self.get_changes_since(watermark)
+            self.store.apply_changes(changes)
+            self.store.set_state("watermark", changes["watermark"])
+            return changes
+        # Cold cache: the caller reloads through stream_all(), which fills it
+        return None
+
+    def stream_all(self) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        if self.store.get_state("watermark"):
+            yield "tasks", self.store.get_tasks()
+            yield "tags", self.store.get_tags()
+            yield "links", self.store.get_links()
+            return
+
+        rows = {"tasks": [], "tags": [], "links": []}
+        for kind, page in super().stream_all():
+            if kind == "tasks":
+                rows["tasks"].extend(page)
+            elif kind in rows:
+                rows[kind] = page
+            yield kind, page
+        self.store.replace_all(rows["tasks"], rows["tags"], rows["links"])
+        watermark = latest_timestamp([row.get("updated_at") for row in rows["tasks"] + rows["tags"]])
+        if watermark:
+            self.store.set_state("watermark", watermark)
+
+    def get_all_tasks(self) -> List[Dict[str, Any]]:
+        return self.store.get_tasks()
+
+    def get_all_tags(self) -> List[Dict[str, Any]]:
+        return self.store.get_tags()
+
+    def get_all_task_tags(self) -> List[Dict[str, Any]]:
+        return self.store.get_links()
+
+    def count_tasks(self, is_completed: Optional[bool] = None, count: str = COUNT_METHOD) -> Optional[int]:
+        if not self.store.get_state("watermark"):
+            return super().count_tasks(is_completed, count)
+        return self.store.count_tasks(is_completed)
+
+    def count_tags(self, count: str = COUNT_METHOD) -> Optional[int]:
+        if not self.store.get_state("watermark"):
+            return super().count_tags(count)
+        return self.store.count_tags()
+
+    def get_tag_by_name(self, tag_name: str) -> Optional[Dict[str, Any]]:
+        return self.store.get_tag_by_name(tag_name)
+
+    def get_task_descriptions(self, task_ids: List[int]) -> Dict[int, Optional[str]]:
+        descriptions = self.store.get_descriptions(task_ids)
+        missing = [task_id for task_id in task_ids if task_id not in descriptions]
+        if missing:
+            try:
+                fetched = super().get_task_descriptions(missing)
+            except Exception as e:
+                # Offline: serve what the store has; the rest is asked for again later
+                return descriptions
+            self.store.put_descriptions(fetched)
+            descriptions.update(fetched)
+        return descriptions
+
+    def get_stored_descriptions(self, task_ids: Optional[List[int]] = None) -> Dict[int, Optional[str]]:
+        return self.store.get_descriptions(task_ids)
+
+    def fill_descriptions(self, after_id: int = 0, limit: int = DESCRIPTION_FILL_BATCH) -> List[int]:
+        # One batch of the tasks after after_id whose descriptions the store
+        # does not have yet; returns the ids asked for, stored or not
+        task_ids = self.store.get_undescribed_task_ids(after_id, limit)
+        if not task_ids:
+            return []
+        self.store.put_descriptions(super().get_task_descriptions(task_ids))
+        return task_ids
+
+    def create_task(self, task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        created_task = super().create_task(task_data)
+        if created_task:
+            self.store.upsert_tasks([created_task])
+        return created_task
+
+    def update_task(self, task_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        updated_task = super().update_task(task_id, updates)
+        if updated_task:
+            self.store.upsert_tasks([updated_task])
+        return updated_task
+
+    def update_tasks(self, task_ids: List[int], updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        updated_tasks = super().update_tasks(task_ids, updates)
+        self.store.upsert_tasks(updated_tasks)
+        return updated_tasks
+
+    def delete_task(self, task_id: int) -> bool:
+        success = super().delete_task(task_id)
+        if success:
+            self.store.delete_task(task_id)
+        return success
+
+    def delete_tasks(self, task_ids: List[int]) -> bool:
+        success = super().delete_tasks(task_ids)
+        if success:
+            for task_id in task_ids:
+                self.store.delete_task(task_id)
+        return success
+
+    def create_tag(self, tag_name: str) -> Optional[Dict[str, Any]]:
+        created_tag = super().create_tag(tag_name)
+        if created_tag:
+            self.store.upsert_tags([created_tag])
+        return created_tag
+
+    def create_tag_with_description(self, tag_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        created_tag = super().create_tag_with_description(tag_data)
+        if created_tag:
+            self.store.upsert_tags([created_tag])
+        return created_tag
+
+    def upsert_tags(self, tag_names: List[str]) -> List[Dict[str, Any]]:
+        tags = super().upsert_tags(tag_names)
+        self.store.upsert_tags(tags)
+        return tags
+
+    def link_task_tag(self, task_id: int, tag_id: int) -> bool:
+        success = super().link_task_tag(task_id, tag_id)
+        if success:
+            self.store.insert_links([{"task_id": task_id, "tag_id": tag_id}])
+        return success
+
+    def link_tags(self, links: List[Dict[str, Any]]) -> bool:
+        success = super().link_tags(links)
+        if success:
+            self.store.insert_links(links)
+        return success
+
+    def upsert_links(self, links: List[Dict[str, Any]]) -> bool:
+        success = super().upsert_links(links)
+        self.store.insert_links(links)
+        return success
+
+    def remove_other_tags(self, tag_ids_by_task: Dict[int, List[int]]) -> bool:
+        success = super().remove_other_tags(tag_ids_by_task)
+        self.store.delete_other_links(tag_ids_by_task)
+        return success
+
+    def remove_all_task_tags(self, task_id: int) -> bool:
+        success = super().remove_all_task_tags(task_id)
+        self.store.delete_links_for_task(task_id)
+        return success
+
+    def update_tag(self, tag_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        updated_tag = super().update_tag(tag_id, updates)
+        if updated_tag:
+            self.store.upsert_tags([updated_tag])
+        return updated_tag
+
+    def delete_tag(self, tag_id: int) -> bool:
+        success = super().delete_tag(tag_id)
+        self.store.delete_tag(tag_id)
+        return success
+
+
+class AsyncDatabaseService:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+
+    def __getattr__(self, name: str):
+        method = getattr(self.db_service, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
@@ -1,7 +1,12 @@
 from typing import Optional, Any
 import json
+import time
 from pathlib import Path
 
+USER_CREDENTIALS_PATH = Path(__file__).resolve().parent.parent.parent / "credentials" / "user.json"
+# Refresh instead of restoring when the access token expires within this many seconds
+SESSION_REFRESH_MARGIN = 60
+
 class AuthService:
     def sign_up(self, supabase, email: str, password: str) -> None:
         supabase.auth.sign_up(
@@ -20,14 +25,50 @@ class AuthService:
         )
         return session
 
+    def restore_session(self, supabase, user_creds: dict) -> Optional[Any]:
+        # Returns None when the refresh token is no longer valid; network errors are raised
+        from supabase_auth.errors import AuthError, AuthRetryableError
+
+        try:
+            if user_creds.get("expires_at", 0) - time.time() <= SESSION_REFRESH_MARGIN:
+                response = supabase.auth.refresh_session(user_creds["refresh_token"])
+            else:
+                response = supabase.auth.set_session(user_creds["access_token"], user_creds["refresh_token"])
+        except AuthRetryableError:
+            raise
+        except AuthError:
+            self.clear_session()
+            return None
+
+        if not response.session or not response.user:
+            self.clear_session()
+            return None
+        self.save_session(user_creds["email"], response.session)
+        return response
+
+    def watch_session(self, supabase, email: str):
+        # The client refreshes the access token on a timer; keep the stored pair current
+        def on_change(event, session):
+            if event == "TOKEN_REFRESHED" and session:
+                self.save_session(email, session)
+
+        supabase.auth.on_auth_state_change(on_change)
+
     def load_user_credentials(self) -> Optional[dict]:
-        cred_path = Path(__file__).resolve().parent.parent.parent / "credentials" / "user.json"
-        if cred_path.exists():
-            with open(cred_path, "r") as f:
+        if USER_CREDENTIALS_PATH.exists():
+            with open(USER_CREDENTIALS_PATH, "r") as f:
                 return json.load(f)
         return None
 
-    def save_user_credentials(self, email: str, password: str):
-        cred_path = Path(__file__).resolve().parent.parent.parent / "credentials" / "user.json"
-        with open(cred_path, "w") as f:
-            json.dump({"email": email, "password": password}, f)
+    def save_session(self, email: str, session):
+        with open(USER_CREDENTIALS_PATH, "w") as f:
+            json.dump({
+                "email": email,
+                "user_id": session.user.id,
+                "access_token": session.access_token,
+                "refresh_token": session.refresh_token,
+                "expires_at": session.expires_at,
+            }, f)
+
+    def clear_session(self):
+        USER_CREDENTIALS_PATH.unlink(missing_ok=True)
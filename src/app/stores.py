@@ -0,0 +1,219 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+LOCAL_STORE_DIR = Path(__file__).resolve().parent.parent.parent / "cache"
+
+TASK_COLUMNS = ("id", "name", "user_id", "created_at", "due_date", "is_completed")
+TAG_COLUMNS = ("id", "name", "user_id", "description")
+
+UPSERT_TASK_SQL = f"INSERT OR REPLACE INTO task_table ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})"
+UPSERT_TAG_SQL = f"INSERT OR REPLACE INTO tag_table ({', '.join(TAG_COLUMNS)}) VALUES ({', '.join('?' * len(TAG_COLUMNS))})"
+INSERT_LINK_SQL = "INSERT OR IGNORE INTO task_tag_join_table (task_id, tag_id) VALUES (?, ?)"
+UPSERT_DESCRIPTION_SQL = "INSERT OR REPLACE INTO task_description_table (task_id, description) VALUES (?, ?)"
+# Stays under SQLite's limit on bound parameters
+ID_CHUNK_SIZE = 500
+
+def local_store_path(user_id: str) -> Path:
+    return LOCAL_STORE_DIR / f"{user_id}.sqlite3"
+
+def has_local_store(user_id: str) -> bool:
+    return local_store_path(user_id).exists()
+
+class LocalStore:
+    def __init__(self, user_id: str, path: Optional[Path] = None):
+        self.user_id = user_id
+        self.path = path or local_store_path(user_id)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.lock, self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS task_table (
+                  id INTEGER PRIMARY KEY,
+                  name TEXT,
+                  user_id TEXT,
+                  created_at TEXT,
+                  due_date TEXT,
+                  is_completed INTEGER DEFAULT 0
+                );
+
+                -- A row means the description has been loaded, even when it is NULL
+                CREATE TABLE IF NOT EXISTS task_description_table (
+                  task_id INTEGER PRIMARY KEY,
+                  description TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS tag_table (
+                  id INTEGER PRIMARY KEY,
+                  name TEXT,
+                  user_id TEXT,
+                  description TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS task_tag_join_table (
+                  task_id INTEGER NOT NULL,
+                  tag_id INTEGER NOT NULL,
+                  PRIMARY KEY (task_id, tag_id)
+                );
+
+                CREATE INDEX IF NOT EXISTS task_tag_join_table_tag_id_idx
+                  ON task_tag_join_table (tag_id);
+
+                CREATE TABLE IF NOT EXISTS sync_state (
+                  key TEXT PRIMARY KEY,
+                  value TEXT
+                );
+                """
+            )
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _task_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        row["is_completed"] = bool(row["is_completed"])
+        return row
+
+    def get_tasks(self) -> List[Dict[str, Any]]:
+        rows = self._query(f"SELECT {', '.join(TASK_COLUMNS)} FROM task_table ORDER BY id")
+        return [self._task_from_row(row) for row in rows]
+
+    def get_descriptions(self, task_ids: Optional[List[int]] = None) -> Dict[int, Optional[str]]:
+        if task_ids is None:
+            rows = self._query("SELECT task_id, description FROM task_description_table")
+        else:
+            task_ids = list(task_ids)
+            rows = []
+            for start in range(0, len(task_ids), ID_CHUNK_SIZE):
+                chunk = task_ids[start:start + ID_CHUNK_SIZE]
+                rows += self._query(
+                    f"SELECT task_id, description FROM task_description_table WHERE task_id IN ({', '.join('?' * len(chunk))})",
+                    tuple(chunk),
+                )
+        return {row["task_id"]: row["description"] for row in rows}
+
+    def get_undescribed_task_ids(self, after_id: int, limit: int) -> List[int]:
+        rows = self._query(
+            """
+            SELECT ts.id FROM task_table AS ts
+            LEFT JOIN task_description_table AS td ON td.task_id = ts.id
+            WHERE td.task_id IS NULL AND ts.id > ?
+            ORDER BY ts.id
+            LIMIT ?
+            """,
+            (after_id, limit),
+        )
+        return [row["id"] for row in rows]
+
+    def put_descriptions(self, descriptions: Dict[int, Optional[str]]):
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT_DESCRIPTION_SQL, list(descriptions.items()))
+
+    def get_tags(self) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM tag_table ORDER BY id")
+
+    def get_links(self) -> List[Dict[str, Any]]:
+        return self._query("SELECT task_id, tag_id FROM task_tag_join_table ORDER BY task_id, tag_id")
+
+    def count_tasks(self, is_completed: Optional[bool] = None) -> int:
+        if is_completed is None:
+            return self._query("SELECT COUNT(*) AS n FROM task_table")[0]["n"]
+        return self._query("SELECT COUNT(*) AS n FROM task_table WHERE is_completed = ?", (int(is_completed),))[0]["n"]
+
+    def count_tags(self) -> int:
+        return self._query("SELECT COUNT(*) AS n FROM tag_table")[0]["n"]
+
+    def get_tag_by_name(self, tag_name: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM tag_table WHERE name = ? LIMIT 1", (tag_name,))
+        return rows[0] if rows else None
+
+    def _write_rows(self, tasks: List[Dict[str, Any]], tags: List[Dict[str, Any]], links: List[Dict[str, Any]]):
+        self.conn.executemany(UPSERT_TASK_SQL, [tuple(task.get(column) for column in TASK_COLUMNS) for task in tasks])
+        # List-only rows may carry a changed description, so what was stored is dropped
+        self.conn.executemany(UPSERT_DESCRIPTION_SQL, [(task["id"], task["description"]) for task in tasks if "description" in task])
+        self.conn.executemany(
+            "DELETE FROM task_description_table WHERE task_id = ?",
+            [(task["id"],) for task in tasks if "description" not in task],
+        )
+        self.conn.executemany(UPSERT_TAG_SQL, [tuple(tag.get(column) for column in TAG_COLUMNS) for tag in tags])
+        self.conn.executemany(INSERT_LINK_SQL, [(link["task_id"], link["tag_id"]) for link in links])
+
+    def upsert_tasks(self, tasks: List[Dict[str, Any]]):
+        with self.lock, self.conn:
+            self._write_rows(tasks, [], [])
+
+    def upsert_tags(self, tags: List[Dict[str, Any]]):
+        with self.lock, self.conn:
+            self._write_rows([], tags, [])
+
+    def insert_links(self, links: List[Dict[str, Any]]):
+        with self.lock, self.conn:
+            self._write_rows([], [], links)
+
+    def _delete_task(self, task_id: int):
+        self.conn.execute("DELETE FROM task_tag_join_table WHERE task_id = ?", (task_id,))
+        self.conn.execute("DELETE FROM task_description_table WHERE task_id = ?", (task_id,))
+        self.conn.execute("DELETE FROM task_table WHERE id = ?", (task_id,))
+
+    def _delete_tag(self, tag_id: int):
+        self.conn.execute("DELETE FROM task_tag_join_table WHERE tag_id = ?", (tag_id,))
+        self.conn.execute("DELETE FROM tag_table WHERE id = ?", (tag_id,))
+
+    def delete_task(self, task_id: int):
+        with self.lock, self.conn:
+            self._delete_task(task_id)
+
+    def delete_tag(self, tag_id: int):
+        with self.lock, self.conn:
+            self._delete_tag(tag_id)
+
+    def delete_links_for_task(self, task_id: int):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM task_tag_join_table WHERE task_id = ?", (task_id,))
+
+    def delete_other_links(self, tag_ids_by_task: Dict[int, List[int]]):
+        with self.lock, self.conn:
+            for task_id, tag_ids in tag_ids_by_task.items():
+                self.conn.execute(
+                    f"DELETE FROM task_tag_join_table WHERE task_id = ? AND tag_id NOT IN ({', '.join('?' * len(tag_ids))})",
+                    (task_id, *tag_ids),
+                )
+
+    def apply_changes(self, changes: Dict[str, Any]):
+        with self.lock, self.conn:
+            for row in changes.get("deleted", []):
+                if row["table_name"] == "task_table":
+                    self._delete_task(row["row_id"])
+                elif row["table_name"] == "tag_table":
+                    self._delete_tag(row["row_id"])
+                elif row["table_name"] == "task_tag_join_table":
+                    self.conn.execute(
+                        "DELETE FROM task_tag_join_table WHERE task_id = ? AND tag_id = ?",
+                        (row["row_id"], row["tag_id"]),
+                    )
+            self._write_rows(changes.get("tasks", []), changes.get("tags", []), changes.get("links", []))
+
+    def replace_all(self, tasks: List[Dict[str, Any]], tags: List[Dict[str, Any]], links: List[Dict[str, Any]]):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM task_tag_join_table")
+            self.conn.execute("DELETE FROM task_description_table")
+            self.conn.execute("DELETE FROM task_table")
+            self.conn.execute("DELETE FROM tag_table")
+            self._write_rows(tasks, tags, links)
+
+    def get_state(self, key: str) -> Optional[str]:
+        rows = self._query("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def set_state(self, key: str, value: str):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
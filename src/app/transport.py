@@ -0,0 +1,72 @@
+import importlib.util
+import threading
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class TransportSettings:
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    connect_timeout: float = 5.0
+    read_timeout: float = 20.0
+    compression: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "TransportSettings":
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in (data or {}).items() if key in names})
+
+
+class ConnectionStats:
+    # Fed by the httpcore trace extension, so it sees real sockets rather than requests
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests = 0
+        self.http2_requests = 0
+
+    def trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event.endswith(".send_request_headers.started"):
+            with self._lock:
+                self.requests += 1
+                if event.startswith("http2."):
+                    self.http2_requests += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "requests": self.requests,
+                "http2_requests": self.http2_requests,
+                "reused_requests": max(0, self.requests - self.connections_opened),
+            }
+
+
+def build_http_client(settings: TransportSettings, stats: ConnectionStats = None, transport: httpx.BaseTransport = None) -> httpx.Client:
+    def attach_trace(request: httpx.Request):
+        request.extensions["trace"] = stats.trace
+
+    headers = {} if settings.compression else {"Accept-Encoding": "identity"}
+    return httpx.Client(
+        http2=settings.http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.read_timeout, connect=settings.connect_timeout),
+        headers=headers,
+        follow_redirects=True,
+        transport=transport,
+        event_hooks={"request": [attach_trace]} if stats is not None else None,
+    )
@@ -325,6 +325,7 @@ class ActionHandler:
                 # COMPLETED → TAGS
                 tabbed_content.active = "tags-tab"
                 self.app.current_tab = "tags"
+                self.app.ui_manager.ensure_tag_list()
                 self.app.ui_manager.update_help_text()
                 if self.app.controller.tags:
                     tags_list = self.app.query_one("#tags-list")
@@ -335,7 +336,7 @@ class ActionHandler:
                         self.app.ui_manager.show_tag_details(self.app.controller.tags[tags_list.index])
 
     def handle_insert_mode(self):
-        if self.app.app_mode != "list":
+        if self.app.app_mode != "list" or not self.app.ensure_writable():
             return
 
         if self.app.current_tab == "tags":
@@ -357,7 +358,7 @@ class ActionHandler:
             task_name_input.focus()
 
     def handle_edit_mode(self):
-        if self.app.app_mode not in ["list", "search_results"]:
+        if self.app.app_mode not in ["list", "search_results"] or not self.app.ensure_writable():
             return
         self.app.previous_app_mode = self.app.app_mode
 
@@ -375,27 +376,28 @@ class ActionHandler:
             return
 
         if self.app.current_tab in ["pending", "completed"]:
+            if not self.app.ensure_writable():
+                return
             self.app.previous_app_mode = self.app.app_mode
             selected_task = self.app.get_currently_selected_task()
             if selected_task:
                 updated_task = self.app.controller.toggle_task_completion(selected_task.id)
                 if updated_task:
-                    self.app.load_tasks()
                     if self.app.app_mode == "search_results":
                         search_term = self.app.previous_search_term
                         self.app.ui_manager.show_search_results(search_term)
-                    elif self.app.app_mode == "list":
-                        return
+                    else:
+                        self.app.ui_manager.load_task_lists()
         elif self.app.current_tab == "tags":
             if self.app.app_mode == "list" and self.app.current_tab == "tags":
                 selected_tag = self.app.get_currently_selected_tag()
                 if selected_tag:
-                    self.app.ui_manager.show_search_results(selected_tag.name)
+                    self.app.ui_manager.show_search_results(selected_tag.name, "tag")
         else:
             return
 
     def handle_delete_mode(self):
-        if self.app.app_mode not in ["list", "search_results"]:
+        if self.app.app_mode not in ["list", "search_results"] or not self.app.ensure_writable():
             return
         self.app.previous_app_mode = self.app.app_mode
 
@@ -417,7 +419,7 @@ class ActionHandler:
         self.app.ui_manager.update_help_text()
 
     def handle_reload(self):
-        self.app.load_tasks()
+        self.app.sync_tasks()
 
     def handle_back(self):
         self.app.back_to_list()
@@ -428,6 +430,8 @@ class ActionHandler:
                 self.app.save_task()
             elif self.app.current_tab == "tags":
                 self.app.save_tag()
+        elif self.app.app_mode in ["list", "search_results"]:
+            self.app.flush_changes()
 
     def handle_clear_form(self):
         if self.app.app_mode in ["create", "edit"]:
@@ -17,6 +17,7 @@ class TabHandler:
                     self.app.ui_manager.show_task_details(self.app.controller.completed_tasks[completed_list.index])
         elif tab_id == "tags-tab":
             self.app.current_tab = "tags"
+            self.app.ui_manager.ensure_tag_list()
             self.app.ui_manager.update_help_text()
             if self.app.controller.tags:
                 tags_list = self.app.query_one("#tags-list")
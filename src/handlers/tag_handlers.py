@@ -1,44 +1,68 @@
 class TagHandler:
     def __init__(self, app):
         self.app = app
+        self.save_running = False
     def save_tag(self):
         try:
             tag_name = self.app.query_one("#tag-name").value.strip()
             tag_description = self.app.query_one("#tag-description").text.strip()
-            if not tag_name:
+            # The form stays open until the save is done; a second save is ignored
+            if not tag_name or self.save_running or not self.app.ensure_writable(needs_session=True):
                 return False
 
-            success = False
             if self.app.app_mode == "create":
-                tag = self.app.controller.create_new_tag(tag_name, tag_description or None)
-                success = tag is not None
+                self.save_running = True
+                self.app.run_in_background(
+                    self.app.controller.create_new_tag_async,
+                    tag_name,
+                    tag_description or None,
+                    on_done=self._after_save_tag,
+                )
             elif self.app.app_mode == "edit" and self.app.current_editing_tag:
-                tag = self.app.controller.update_tag(self.app.current_editing_tag, tag_name, tag_description or None)
-                success = tag is not None
-
-            if success:
-                self.clear_tag_form()
-                self.app.load_tasks()
-                self.app.ui_manager.back_to_list()
-                return True
+                self.save_running = True
+                self.app.run_in_background(
+                    self.app.controller.update_tag_async,
+                    self.app.current_editing_tag,
+                    tag_name,
+                    tag_description or None,
+                    on_done=self._after_save_tag,
+                )
             else:
                 return False
+            return True
         except Exception as e:
             return False
 
+    def _after_save_tag(self, tag):
+        self.save_running = False
+        if tag is None:
+            self.app.notify("Failed to save the tag.", severity="error")
+            return
+        self.clear_tag_form()
+        self.app.ui_manager.load_task_lists()
+        self.app.ui_manager.back_to_list()
+
     def clear_tag_form(self):
         self.app.query_one("#tag-name").value = ""
         self.app.query_one("#tag-description").text = ""
 
     def confirm_delete_tag(self):
-        if self.app.pending_delete_tag:
-            success = self.app.controller.delete_tag(self.app.pending_delete_tag)
+        if self.app.pending_delete_tag and self.app.ensure_writable(needs_session=True):
+            tag_to_delete = self.app.pending_delete_tag
             self.app.pending_delete_tag = None
+            self.app.run_in_background(
+                self.app.controller.delete_tag_async,
+                tag_to_delete,
+                on_done=self._after_delete_tag,
+            )
 
-            if success:
-                self.app.load_tasks()
+    def _after_delete_tag(self, success: bool):
+        if success:
+            self.app.ui_manager.load_task_lists()
+        else:
+            self.app.notify("Failed to delete the tag.", severity="error")
 
-            self.app.ui_manager.back_to_list()
+        self.app.ui_manager.back_to_list()
 
     def cancel_delete_tag(self):
         self.app.pending_delete_tag = None
@@ -3,6 +3,7 @@ from app.models import Task
 class TaskHandler:
     def __init__(self, app):
         self.app = app
+        self.create_running = False
 
     def save_task(self):
         try:
@@ -19,16 +20,26 @@ class TaskHandler:
                 tags = [tag.strip() for tag in tags_input.split(",") if tag.strip()]
 
             if self.app.app_mode == "create":
-                task = self.app.controller.create_new_task(
-                    name=task_name,
-                    description=description or None,
-                    due_date=due_date or None,
-                    tags=tags
-                )
-
-                if not task:
+                # A second save while the first create runs would add the task twice
+                if self.create_running or not self.app.ensure_writable(needs_session=True):
                     return False
-
+                # The form can be left before the create finishes, so the modes
+                # are taken now rather than when it is done
+                previous_app_mode = self.app.previous_app_mode
+
+                def after_create(task):
+                    self.create_running = False
+                    self._after_save(task, "create", previous_app_mode)
+
+                self.create_running = True
+                self.app.run_in_background(
+                    self.app.controller.create_new_task_async,
+                    task_name,
+                    description or None,
+                    due_date or None,
+                    tags,
+                    on_done=after_create,
+                )
             elif self.app.app_mode == "edit":
                 task = self.app.controller.update_task(
                     task_id=self.app.current_editing_task.id,
@@ -41,14 +52,7 @@ class TaskHandler:
                 if not task:
                     return False
 
-            if self.app.previous_app_mode == "search_results":
-                self.app.controller.load_all_tasks()
-                search_term = self.app.previous_search_term
-                self.app.ui_manager.show_search_results(search_term)
-            else:
-                self.app.ui_manager.clear_form()
-                self.app.load_tasks()
-                self.app.ui_manager.back_to_list()
+                self._after_save(task, "edit", self.app.previous_app_mode)
             return True
 
         except ValueError as e:
@@ -56,6 +60,27 @@ class TaskHandler:
         except Exception as e:
             return False
 
+    def _after_save(self, task: Task, saved_mode: str, previous_app_mode: str):
+        if not task:
+            self.app.notify("Failed to save the task.", severity="error")
+            return
+
+        if self.app.app_mode != saved_mode:
+            # The form was left while the task was being saved
+            if self.app.app_mode == "list":
+                self.app.ui_manager.load_task_lists()
+            else:
+                self.app.ui_manager.task_lists_stale = True
+            return
+
+        if previous_app_mode == "search_results":
+            search_term = self.app.previous_search_term
+            self.app.ui_manager.show_search_results(search_term)
+        else:
+            self.app.ui_manager.clear_form()
+            self.app.ui_manager.load_task_lists()
+            self.app.ui_manager.back_to_list()
+
     def confirm_delete(self):
         if not self.app.pending_delete_task:
             return
@@ -65,20 +90,9 @@ class TaskHandler:
         self.app.pending_delete_task = None
 
         if success:
-            if task_to_delete.is_completed:
-                if task_to_delete in self.app.controller.completed_tasks:
-                    self.app.controller.completed_tasks.remove(task_to_delete)
-            else:
-                if task_to_delete in self.app.controller.pending_tasks:
-                    self.app.controller.pending_tasks.remove(task_to_delete)
-
             if self.app.previous_app_mode == "search_results":
-                if task_to_delete.is_completed:
-                    if task_to_delete in self.app.search_completed_results:
-                        self.app.search_completed_results.remove(task_to_delete)
-                else:
-                    if task_to_delete in self.app.search_pending_results:
-                        self.app.search_pending_results.remove(task_to_delete)
+                self.app.search_pending_results = [t for t in self.app.search_pending_results if t.id != task_to_delete.id]
+                self.app.search_completed_results = [t for t in self.app.search_completed_results if t.id != task_to_delete.id]
 
             self.app.app_mode = self.app.previous_app_mode
             self.app.ui_manager._hide_all_views()
@@ -110,4 +124,4 @@ class TaskHandler:
 
     def perform_search(self):
         search_term = self.app.query_one("#search-input").text.strip()
-        self.app.ui_manager.show_search_results(search_term)
+        self.app.ui_manager.show_search_results(search_term, "text")
@@ -1,32 +1,41 @@
+import time
+STARTUP_TIME = time.perf_counter()
+
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
 from textual.widgets import Button, Header, Footer, Static, Label, ListView, TabbedContent, TabPane
 from textual import on, events
 from typing import List
+import asyncio
 import getpass
+import os
 
 from app.models import Task, Tag
 from app.controllers import Controller
+from app.countdown import CountdownScheduler
+from app.feeds import ChangeFeed, RealtimeChangeFeed
+from app.services import LocalDatabaseService
 from app.sessions import AuthService
-from ui.widgets import CustomInput, CustomTextArea
+from app.clients import LazySupabaseClient, load_supabase_credentials
+from app.stores import has_local_store
+from ui.widgets import CustomInput, CustomTextArea, VirtualListView
 from handlers.handlers import KeyboardHandler, ActionHandler
 from ui.ui_manager import UIManager
 from handlers.task_handlers import TaskHandler
 from handlers.tag_handlers import TagHandler
 from handlers.tab_handlers import TabHandler
 
-from supabase import create_client, Client
-import json
 import sys
-from pathlib import Path
-
-SUPABASE_CREDENTIALS_PATH = Path(__file__).resolve().parent.parent / "credentials" / "supabase.json"
-with open(SUPABASE_CREDENTIALS_PATH, "r") as f:
-    supabase_cred = json.load(f)
 
+supabase_cred = load_supabase_credentials()
 url: str = supabase_cred["url"]
 key: str = supabase_cred["key"]
-supabase: Client = create_client(url, key)
+supabase = LazySupabaseClient(url, key, supabase_cred.get("transport"))
+
+STARTUP_TIMING_ENV = "TUIDO_STARTUP_TIMING"
+FIRST_PAINT_TARGET_MS = 500
+HTTP_STATS_ENV = "TUIDO_HTTP_STATS"
+PAGE_PAINT_INTERVAL = 0.25
 
 class TodoApp(App):
     BINDINGS = [
@@ -148,11 +157,11 @@ class TodoApp(App):
         background: $accent;
     }
 
-    ListView {
+    ListView, VirtualListView {
         border: round $accent;
     }
 
-    ListView:focus {
+    ListView:focus, VirtualListView:focus {
         border: thick $accent;
     }
 
@@ -223,9 +232,20 @@ class TodoApp(App):
     # }
     """
 
-    def __init__(self, controller: Controller, initial_search: str = None):
+    def __init__(self, controller: Controller, initial_search: str = None, pending_sign_in=None, change_feed: ChangeFeed = None):
         super().__init__()
         self.controller = controller
+        # Blocking sign-in to run after the first paint when starting from the local cache
+        self.pending_sign_in = pending_sign_in
+        # Set when the background sign-in fails; writes are refused from then on
+        self.read_only_reason = None
+        self.quit_warned = False
+        self.first_paint_ms = None
+        self.change_feed = change_feed
+        self.sync_running = False
+        self.last_page_paint = None
+        self.descriptions_in_flight = set()
+        self.sync_requested = False
         self.keyboard_handler = KeyboardHandler(self)
         self.action_handler = ActionHandler(self)
         self.ui_manager = UIManager(self)
@@ -244,9 +264,13 @@ class TodoApp(App):
         self.search_pending_results: List[Task] = []
         self.search_completed_results: List[Task] = []
         self.previous_search_term = ""
+        self.search_mode = "tag"
         self.initial_search = initial_search
 
         self.theme = "nord"
+        self.loading_count = 0
+        self.countdown = CountdownScheduler()
+        self.countdown_timer = None
 
         self.controller.load_all_tasks()
 
@@ -358,20 +382,239 @@ class TodoApp(App):
 
     def on_mount(self):
         tabbed_content = self.query_one("#task-tabs", TabbedContent)
-        tabbed_content.add_pane(TabPane("TODO", ListView(id="pending-tasks"), id="pending-tab"))
-        tabbed_content.add_pane(TabPane("DONE", ListView(id="completed-tasks"), id="completed-tab"))
+        tabbed_content.add_pane(TabPane("TODO", VirtualListView(id="pending-tasks"), id="pending-tab"))
+        tabbed_content.add_pane(TabPane("DONE", VirtualListView(id="completed-tasks"), id="completed-tab"))
         tabbed_content.add_pane(TabPane("TAGS", ListView(id="tags-list"), id="tags-tab"))
 
         if self.initial_search:
-            self.call_after_refresh(lambda: self.ui_manager.show_search_results(self.initial_search))
+            self.call_after_refresh(lambda: self.ui_manager.show_search_results(self.initial_search, "tag"))
         else:
             self.call_after_refresh(self.ui_manager.load_task_lists)
+        self.call_after_refresh(lambda: self.call_after_refresh(self.record_first_paint))
         self.ui_manager.update_help_text()
+        self.controller.mutation_queue.on_rollback = self.on_write_rollback
+        if self.pending_sign_in:
+            self.controller.mutation_queue.start(ready=False)
+            self.run_worker(self._sign_in(), name="sign_in", group="sign_in")
+        else:
+            self.controller.mutation_queue.start()
+            self.sync_tasks()
+            self.start_change_feed()
+
+    def record_first_paint(self):
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+
+    async def _sign_in(self):
+        try:
+            signed_in = await asyncio.to_thread(self.pending_sign_in)
+        except Exception:
+            self._go_read_only("Could not reach the server. Working offline: changes can't be saved until TuiDo restarts.", "warning")
+            return
+        if not signed_in:
+            self._go_read_only("Session expired. Restart TuiDo to sign in again; changes can't be saved.", "error")
+            return
+        self.pending_sign_in = None
+        self.controller.mutation_queue.set_ready()
+        self.sync_tasks()
+        self.start_change_feed()
+        self.fill_descriptions()
+        # Descriptions the store did not have were skipped until now
+        self.ui_manager.refresh_descriptions()
+
+    def _go_read_only(self, reason: str, severity: str):
+        self.read_only_reason = reason
+        self.notify(reason, severity=severity, timeout=10)
+        # Writes made while the sign-in was running can never be sent
+        self.controller.mutation_queue.discard_pending()
+
+    def ensure_writable(self, needs_session: bool = False) -> bool:
+        # Task edits wait in the mutation queue for the sign-in; writes that go
+        # straight to the server (creates, tag changes) need the session now
+        if self.read_only_reason:
+            self.notify(self.read_only_reason, severity="warning")
+            return False
+        if needs_session and not self.controller.mutation_queue.is_ready:
+            self.notify("Still signing in. Try again in a moment.", severity="warning")
+            return False
+        return True
 
     def load_tasks(self):
-        if not self.controller.load_all_tasks():
+        self.run_worker(self._load_tasks(), name="load", group="load", exclusive=True)
+
+    async def _load_tasks(self):
+        self.last_page_paint = None
+        self.begin_loading()
+        try:
+            loaded = await self.controller.load_all_tasks_async(
+                on_page=self.on_tasks_page, on_totals=self.ui_manager.update_tab_badges
+            )
+        finally:
+            self.end_loading()
+        if loaded:
+            self.ui_manager.load_task_lists()
+            # A cold load has just replaced the store's rows
+            self.fill_descriptions()
+
+    def on_tasks_page(self):
+        # Paint the first page at once, then at most every PAGE_PAINT_INTERVAL
+        now = time.monotonic()
+        if self.last_page_paint is not None and now - self.last_page_paint < PAGE_PAINT_INTERVAL:
+            return
+        self.last_page_paint = now
+        if self.app_mode == "list":
+            self.ui_manager.load_task_lists()
+
+    def run_in_background(self, operation, *args, on_done=None, group: str = "controller", exclusive: bool = False):
+        # operation is a controller coroutine that sends its blocking server
+        # calls to a thread itself and changes shared state on the event loop
+        async def run():
+            self.begin_loading()
+            try:
+                result = await operation(*args)
+            finally:
+                self.end_loading()
+            if on_done:
+                on_done(result)
+
+        self.run_worker(run(), group=group, exclusive=exclusive)
+
+    def begin_loading(self):
+        self.loading_count += 1
+        self.ui_manager.set_loading(True)
+
+    def end_loading(self):
+        self.loading_count = max(0, self.loading_count - 1)
+        if self.loading_count == 0:
+            self.ui_manager.set_loading(False)
+
+    def sync_tasks(self):
+        if not self.controller.mutation_queue.is_ready:
+            return
+        if self.sync_running:
+            # Let the running sync go again rather than cancel it halfway
+            self.sync_requested = True
             return
-        self.ui_manager.load_task_lists()
+        self.sync_running = True
+        self.run_worker(self._sync_tasks(), name="sync", group="sync")
+
+    async def _sync_tasks(self):
+        try:
+            self.sync_requested = True
+            while self.sync_requested:
+                self.sync_requested = False
+                self.begin_loading()
+                try:
+                    changes = await self.controller.sync_with_remote_async()
+                finally:
+                    self.end_loading()
+                self._apply_remote_changes(changes)
+        finally:
+            self.sync_running = False
+
+    def prefetch_descriptions(self, task_ids: List[int]):
+        missing = [
+            task_id for task_id in self.controller.missing_description_ids(task_ids)
+            if task_id not in self.descriptions_in_flight
+        ]
+        if not missing:
+            return
+        self.descriptions_in_flight.update(missing)
+        self.run_worker(self._load_descriptions(missing), group="descriptions")
+
+    async def _load_descriptions(self, task_ids: List[int]):
+        try:
+            descriptions = await asyncio.to_thread(self.controller.fetch_task_descriptions, task_ids)
+        finally:
+            self.descriptions_in_flight.difference_update(task_ids)
+        if descriptions:
+            self.controller.cache_task_descriptions(descriptions)
+            self.ui_manager.on_descriptions_loaded(descriptions)
+
+    def fill_descriptions(self):
+        if not self.controller.mutation_queue.is_ready:
+            return
+        self.run_worker(self._fill_descriptions(), name="fill_descriptions", group="fill_descriptions", exclusive=True)
+
+    async def _fill_descriptions(self):
+        # Completes the local store batch by batch so search covers every description
+        after_id = 0
+        while True:
+            task_ids = await asyncio.to_thread(self.controller.fill_task_descriptions, after_id)
+            if not task_ids:
+                return
+            self.controller.index_task_descriptions(task_ids)
+            after_id = max(task_ids)
+
+    def start_change_feed(self):
+        if self.change_feed is None:
+            return
+        self.change_feed.on_change = self.on_feed_changes
+        # Every (re)connect catches up on what the feed missed through a delta sync
+        self.change_feed.on_connected = self.sync_tasks
+        self.run_worker(self.change_feed.run(), name="feed", group="feed")
+
+    def on_feed_changes(self, changes: dict):
+        if self.controller.apply_feed_changes(changes):
+            self._repaint_remote_changes()
+
+    def _apply_remote_changes(self, changes):
+        # The local store has already moved past these rows, so they are applied
+        # in every mode; only the repaint waits for the list view
+        if changes is None:
+            self.load_tasks()
+        elif self.controller.apply_changes(changes):
+            self._repaint_remote_changes()
+
+    def _repaint_remote_changes(self):
+        self.ui_manager.tag_list_stale = True
+        if self.app_mode == "list":
+            self.ui_manager.load_task_lists()
+        else:
+            self.ui_manager.task_lists_stale = True
+
+    def on_write_rollback(self):
+        self.notify("Failed to save changes. Reverted.", severity="error")
+        if self.app_mode == "search_results":
+            self.ui_manager.show_search_results(self.previous_search_term)
+        elif self.app_mode == "list":
+            self.ui_manager.load_task_lists()
+
+    async def action_quit(self):
+        queue = self.controller.mutation_queue
+        if not queue.is_ready and queue.pending_count and not self.quit_warned:
+            self.quit_warned = True
+            self.notify(
+                f"{queue.pending_count} change(s) are waiting for sign-in and will be lost. Press q again to quit.",
+                severity="warning",
+            )
+            return
+        if self.change_feed is not None:
+            await self.change_feed.close()
+        await queue.flush()
+        await super().action_quit()
+
+    def flush_changes(self):
+        self.run_worker(self.controller.mutation_queue.flush(), group="flush")
+
+    def schedule_countdowns(self):
+        self.countdown.sync(self.controller.pending_tasks)
+        self._arm_countdown_timer()
+
+    def _arm_countdown_timer(self):
+        if self.countdown_timer:
+            self.countdown_timer.stop()
+            self.countdown_timer = None
+        deadline = self.countdown.next_deadline()
+        if deadline is not None:
+            self.countdown_timer = self.set_timer(max(deadline - time.time(), 0), self.on_countdown)
+
+    def on_countdown(self):
+        self.countdown_timer = None
+        changed_task_ids = self.countdown.pop_due()
+        if changed_task_ids:
+            self.ui_manager.refresh_task_rows(changed_task_ids)
+        self._arm_countdown_timer()
 
     def get_currently_selected_task(self) -> Task:
         if self.app_mode == "search_results":
@@ -382,11 +625,11 @@ class TodoApp(App):
             completed_source = self.controller.completed_tasks
 
         if self.current_tab == "pending":
-            pending_list = self.query_one("#pending-tasks", ListView)
+            pending_list = self.query_one("#pending-tasks", VirtualListView)
             if pending_list.index is not None and 0 <= pending_list.index < len(pending_source):
                 return pending_source[pending_list.index]
         elif self.current_tab == "completed":
-            completed_list = self.query_one("#completed-tasks", ListView)
+            completed_list = self.query_one("#completed-tasks", VirtualListView)
             if completed_list.index is not None and 0 <= completed_list.index < len(completed_source):
                 return completed_source[completed_list.index]
         return None
@@ -580,17 +823,43 @@ def main():
     else:
         print("Running TuiDo ...")
 
-    if user_creds:
+    pending_sign_in = None
+    if user_creds and user_creds.get("refresh_token") and has_local_store(user_creds["user_id"]):
+        # The local cache can paint the lists before the network is touched;
+        # the stored session is restored in the background once the app is up
+        user_id = user_creds["user_id"]
+
+        def pending_sign_in():
+            session = auth_service.restore_session(supabase, user_creds)
+            if not session or session.user.id != user_id:
+                return False
+            auth_service.watch_session(supabase, user_creds["email"])
+            return True
+    elif user_creds and user_creds.get("refresh_token"):
+        email = user_creds["email"]
+        try:
+            session = auth_service.restore_session(supabase, user_creds)
+            if not session:
+                print("Session expired. Please sign in again.")
+                user_creds = None
+        except Exception as e:
+            print(f"Error in auto login: {e}")
+            user_creds = None
+    elif user_creds and user_creds.get("password"):
+        # Credentials saved by older versions; trade the password for a session once
         email = user_creds["email"]
-        password = user_creds["password"]
         try:
-            session = auth_service.sign_in(supabase, email, password)
-            if not session.user:
+            session = auth_service.sign_in(supabase, email, user_creds["password"])
+            if session.user:
+                auth_service.save_session(email, session.session)
+            else:
                 print("Auto login failed. Please re-enter credentials.")
                 user_creds = None
         except Exception as e:
             print(f"Error in auto login: {e}")
             user_creds = None
+    else:
+        user_creds = None
 
     if not user_creds:
         answer = input("Do you have an account? (y/n): ")
@@ -608,20 +877,34 @@ def main():
                 return
 
             if session.user:
-                auth_service.save_user_credentials(email, password)
+                auth_service.save_session(email, session.session)
                 print("Login successful")
             else:
                 print("Login failed. Please try again.")
+                return
         except Exception as e:
             print(f"Login error: {e}")
             return
 
-    controller = Controller(supabase=supabase, user_id=session.user.id)
-    app = TodoApp(controller=controller, initial_search=initial_search)
+    if not pending_sign_in:
+        user_id = session.user.id
+        auth_service.watch_session(supabase, email)
+    db_service = LocalDatabaseService(supabase, user_id)
+    controller = Controller(supabase=supabase, user_id=user_id, db_service=db_service)
+    change_feed = RealtimeChangeFeed(supabase, user_id)
+    app = TodoApp(controller=controller, initial_search=initial_search, pending_sign_in=pending_sign_in, change_feed=change_feed)
 
     app.title = "TuiDo"
     app.sub_title = "Todo Manager App"
     app.run(mouse=False)
 
+    if os.environ.get(STARTUP_TIMING_ENV) and app.first_paint_ms is not None:
+        status = "ok" if app.first_paint_ms <= FIRST_PAINT_TARGET_MS else "over target"
+        print(f"First paint: {app.first_paint_ms:.0f} ms (target {FIRST_PAINT_TARGET_MS} ms, {status})")
+    if os.environ.get(HTTP_STATS_ENV) and supabase.http_stats is not None:
+        stats = supabase.http_stats.snapshot()
+        print(f"HTTP: {stats['requests']} requests over {stats['connections_opened']} connections ({stats['http2_requests']} over HTTP/2)")
+    supabase.close()
+
 if __name__ == "__main__":
     main()
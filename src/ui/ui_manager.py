@@ -1,11 +1,23 @@
 from app.models import Task, Tag
 from app.helpers import TaskSorter
+from app.descriptions import DESCRIPTION_LOADING, PREFETCH_RADIUS
 from typing import List
-from textual.widgets import Label, ListItem
+from textual.widgets import Label, ListItem, TabbedContent
+
+# (pane id, tab title, total shown in its badge)
+TAB_BADGES = [
+    ("pending-tab", "TODO", "pending"),
+    ("completed-tab", "DONE", "completed"),
+    ("tags-tab", "TAGS", "tags"),
+]
 
 class UIManager:
     def __init__(self, app):
         self.app = app
+        self.tag_list_stale = True
+        # Set when remote changes land while a form or search is showing
+        self.task_lists_stale = False
+        self.details_task: Task = None
 
     def update_help_text(self):
         try:
@@ -28,11 +40,32 @@ class UIManager:
         except Exception:
             pass
 
+    def set_loading(self, is_loading: bool):
+        self.app.sub_title = "Loading..." if is_loading else "Todo Manager App"
+
+    def update_tab_badges(self):
+        try:
+            totals = {kind: self.app.controller.get_total(kind) for _, _, kind in TAB_BADGES}
+            if self.app.app_mode == "search_results":
+                totals["pending"] = len(self.app.search_pending_results)
+                totals["completed"] = len(self.app.search_completed_results)
+
+            tabbed_content = self.app.query_one("#task-tabs", TabbedContent)
+            for pane_id, title, kind in TAB_BADGES:
+                tab = tabbed_content.get_tab(pane_id)
+                label = f"{title} ({totals[kind]})"
+                if tab.label_text != label:
+                    tab.label = label
+        except Exception as e:
+            pass
+
     def show_task_details(self, task: Task):
         try:
+            self.details_task = task
             details_text = self.app.controller.get_task_details_text(task)
             task_details = self.app.query_one("#task-details")
             task_details.update(details_text)
+            self.app.prefetch_descriptions(self._description_prefetch_ids(task))
         except Exception as e:
             pass
 
@@ -47,19 +80,27 @@ class UIManager:
         delete_title = self.app.query_one("#delete-confirm-title")
         delete_title.update(f"Delete Task: {task.name}")
 
-        delete_message = self.app.query_one("#delete-confirm-message")
-        delete_message.update(
-            f"⚠️  WARNING: This action cannot be undone!\n\n"
-            f"Task Name: {task.name}\n"
-            f"Description: {task.description or 'No description'}\n\n"
-            f"Are you sure you want to delete this task?"
-        )
+        self._update_delete_message(task)
+        if not self.app.controller.has_task_description(task.id):
+            self.app.prefetch_descriptions([task.id])
 
         self._hide_all_views()
         self.app.query_one("#delete-confirm-view").remove_class("hidden")
 
         self.app.query_one("#cancel-delete-btn").focus()
 
+    def _update_delete_message(self, task: Task):
+        if self.app.controller.has_task_description(task.id):
+            description = self.app.controller.get_task_description(task.id) or "No description"
+        else:
+            description = DESCRIPTION_LOADING
+        self.app.query_one("#delete-confirm-message").update(
+            f"⚠️  WARNING: This action cannot be undone!\n\n"
+            f"Task Name: {task.name}\n"
+            f"Description: {description}\n\n"
+            f"Are you sure you want to delete this task?"
+        )
+
     def show_tag_form(self, tag: Tag = None):
         if tag:
             self.app.app_mode = "edit"
@@ -113,10 +154,57 @@ class UIManager:
 
         self.app.query_one("#cancel-delete-tag-btn").focus()
 
+    def _description_prefetch_ids(self, task: Task) -> List[int]:
+        # The shown task first, then the rows around it in the visible list
+        if self.app.app_mode == "search_results":
+            sources = {"pending": self.app.search_pending_results, "completed": self.app.search_completed_results}
+        else:
+            sources = {"pending": self.app.controller.pending_tasks, "completed": self.app.controller.completed_tasks}
+        source = sources.get(self.app.current_tab)
+        task_ids = [task.id]
+        try:
+            index = self.app.query_one(f"#{self.app.current_tab}-tasks").index
+        except Exception:
+            return task_ids
+        if source is None or index is None or not 0 <= index < len(source) or source[index].id != task.id:
+            return task_ids
+        for offset in range(1, PREFETCH_RADIUS + 1):
+            for position in (index + offset, index - offset):
+                if 0 <= position < len(source):
+                    task_ids.append(source[position].id)
+        return task_ids
+
+    def refresh_descriptions(self):
+        if self.app.app_mode in ["list", "search_results"] and self.details_task is not None:
+            self.show_task_details(self.details_task)
+        elif self.app.app_mode == "edit" and self.app.current_editing_task is not None:
+            if not self.app.controller.has_task_description(self.app.current_editing_task.id):
+                self.app.prefetch_descriptions([self.app.current_editing_task.id])
+        elif self.app.app_mode == "delete" and self.app.pending_delete_task is not None:
+            if not self.app.controller.has_task_description(self.app.pending_delete_task.id):
+                self.app.prefetch_descriptions([self.app.pending_delete_task.id])
+
+    def on_descriptions_loaded(self, descriptions: dict):
+        if self.app.app_mode in ["list", "search_results"]:
+            if self.details_task is not None and self.details_task.id in descriptions:
+                self.show_task_details(self.details_task)
+        elif self.app.app_mode == "edit":
+            task = self.app.current_editing_task
+            description_input = self.app.query_one("#description")
+            # Fill the field only if the user has not started typing into it
+            if task is not None and task.id in descriptions and not description_input.text:
+                description_input.text = descriptions[task.id] or ""
+        elif self.app.app_mode == "delete":
+            task = self.app.pending_delete_task
+            if task is not None and task.id in descriptions:
+                self._update_delete_message(task)
+
     def show_edit_form(self, task: Task = None):
         if task:
             self.app.app_mode = "edit"
             self.app.current_editing_task = task
+            if not self.app.controller.has_task_description(task.id):
+                self.app.prefetch_descriptions([task.id])
 
             edit_data = self.app.controller.prepare_task_for_editing(task)
 
@@ -161,6 +249,8 @@ class UIManager:
 
             self.update_help_text()
             self.app.query_one("#pending-tasks").focus()
+            if self.task_lists_stale and self.app.app_mode == "list":
+                self.load_task_lists()
             return
 
         self.app.search_pending_results = []
@@ -172,6 +262,8 @@ class UIManager:
         self.app.current_editing_tag = None
         self.app.pending_delete_task = None
         self.app.pending_delete_tag = None
+        if self.task_lists_stale:
+            self.load_task_lists()
 
         if self.app.current_tab == "tags":
             self.load_tag_list()
@@ -235,11 +327,9 @@ class UIManager:
                 details_text += "\n"
             details_text += f"This tag is used by the following {task_count} tasks:\n"
 
-            for task in self.app.controller.pending_tasks + self.app.controller.completed_tasks:
-                task_tags = self.app.controller.get_tags_for_task(task.id)
-                if any(t.id == tag.id for t in task_tags):
-                    status = "✓" if task.is_completed else "○"
-                    details_text += f"  {status} {task.name}\n"
+            for task in self.app.controller.get_tasks_with_tag(tag):
+                status = "✓" if task.is_completed else "○"
+                details_text += f"  {status} {task.name}\n"
 
             if task_count == 0:
                 details_text += "  No tasks using this tag\n"
@@ -251,25 +341,41 @@ class UIManager:
     def load_tag_list(self):
         try:
             tags_list = self.app.query_one("#tags-list")
-            tags_list.clear()
 
+            rows = []
             for tag in self.app.controller.tags:
                 task_count = self.app.controller.count_tasks_with_tag(tag)
                 completed_task_count = self.app.controller.count_completed_tasks_with_tag(tag)
-                display_text = f"[b u]{tag.name}[/b u] ({completed_task_count} / {task_count} tasks)"
-                tags_list.append(ListItem(Label(display_text)))
+                rows.append(f"[b u]{tag.name}[/b u] ({completed_task_count} / {task_count} tasks)")
 
             if not self.app.controller.tags:
-                tags_list.append(ListItem(Label("No tags available")))
+                rows.append("No tags available")
+            self._patch_list_view(tags_list, rows)
+            self.tag_list_stale = False
+            self.update_tab_badges()
         except Exception as e:
             pass
 
+    def _patch_list_view(self, list_view, rows: List[str]):
+        # Relabel mounted items in place and only mount/remove the difference
+        items = list(list_view.children)
+        for item, row in zip(items, rows):
+            label = item.query_one(Label)
+            if label.content != row:
+                label.update(row)
+        if len(rows) > len(items):
+            list_view.extend([ListItem(Label(row)) for row in rows[len(items):]])
+        for item in items[len(rows):]:
+            item.remove()
+
+    def ensure_tag_list(self):
+        if self.tag_list_stale:
+            self.load_tag_list()
+
     def load_task_lists(self):
         try:
             pending_list = self.app.query_one("#pending-tasks")
             completed_list = self.app.query_one("#completed-tasks")
-            pending_list.clear()
-            completed_list.clear()
 
             if self.app.app_mode == "search_results":
                 pending_source = self.app.search_pending_results
@@ -278,47 +384,71 @@ class UIManager:
                 pending_source = self.app.controller.pending_tasks
                 completed_source = self.app.controller.completed_tasks
 
-            for task in pending_source:
-                task_text = self.app.controller.get_task_display_text(task)
-                pending_list.append(ListItem(Label(task_text)))
+            self._patch_task_list(pending_list, pending_source)
+            self._patch_task_list(completed_list, completed_source)
+            self.app.schedule_countdowns()
+            self.update_tab_badges()
+            if self.app.app_mode != "search_results":
+                self.task_lists_stale = False
 
-            for task in completed_source:
-                task_text = self.app.controller.get_task_display_text(task)
-                completed_list.append(ListItem(Label(task_text)))
-
-            self.load_tag_list()
+            self.tag_list_stale = True
 
             if self.app.current_tab == "tags":
                 self.load_tag_list()
 
                 tags_list = self.app.query_one("#tags-list")
                 if self.app.controller.tags:
-                    tags_list.index = 0
+                    if tags_list.index is None:
+                        tags_list.index = 0
                     tags_list.focus()
-                    self.show_tag_details(self.app.controller.tags[0])
+                    self.show_tag_details(self.app.controller.tags[tags_list.index])
                 else:
-                    tags_list.append(ListItem(Label("No tags available")))
                     task_details = self.app.query_one("#task-details")
                     task_details.update("No tags available")
-            elif pending_source:
-                pending_list.index = 0
-                self.app.current_tab = "pending"
-                pending_list.focus()
-                self.show_task_details(pending_source[0])
-            elif completed_source:
-                completed_list.index = 0
-                self.app.current_tab = "completed"
-                completed_list.focus()
-                self.show_task_details(completed_source[0])
-            else:
-                pending_list.append(ListItem(Label("No pending tasks")))
-                completed_list.append(ListItem(Label("No completed tasks")))
+            elif not self._select_task_row(pending_source, completed_source):
+                pending_list.set_rows(["No pending tasks"])
+                completed_list.set_rows(["No completed tasks"])
                 task_details = self.app.query_one("#task-details")
                 task_details.update("No tasks available")
 
         except Exception as e:
             pass
 
+    def _patch_task_list(self, task_list, tasks: list):
+        rows = [self.app.controller.get_task_display_text(task) for task in tasks]
+        task_list.set_rows(rows, [task.id for task in tasks])
+
+    def refresh_task_rows(self, task_ids):
+        pending_list = self.app.query_one("#pending-tasks")
+        completed_list = self.app.query_one("#completed-tasks")
+        for task_id in task_ids:
+            task = self.app.controller.get_task_by_id(task_id)
+            if task:
+                task_text = self.app.controller.get_task_display_text(task)
+                pending_list.set_row(task_id, task_text)
+                completed_list.set_row(task_id, task_text)
+
+    def _select_task_row(self, pending_source: list, completed_source: list) -> bool:
+        # Stay on the current tab and keep its highlighted row when it still has tasks
+        task_lists = {
+            "pending": (self.app.query_one("#pending-tasks"), pending_source),
+            "completed": (self.app.query_one("#completed-tasks"), completed_source),
+        }
+        tab_order = ["pending", "completed"]
+        if self.app.current_tab == "completed":
+            tab_order.reverse()
+
+        for tab in tab_order:
+            task_list, source = task_lists[tab]
+            if source:
+                if task_list.index is None:
+                    task_list.index = 0
+                self.app.current_tab = tab
+                task_list.focus()
+                self.show_task_details(source[task_list.index])
+                return True
+        return False
+
     def _hide_all_views(self):
         views_to_hide = [
             "#task-details", "#edit-form", "#tag-form", "#search-form","#delete-confirm-view","#delete-tag-confirm-view"
@@ -343,8 +473,10 @@ class UIManager:
         search_input = self.app.query_one("#search-input")
         self.app.call_after_refresh(lambda: self.app.set_focus(search_input))
 
-    def show_search_results(self, search_term: str):
+    def show_search_results(self, search_term: str, search_mode: str = None):
         self.app.previous_search_term = search_term
+        if search_mode:
+            self.app.search_mode = search_mode
         if not search_term:
             self.app.task_handler.cancel_search()
             return
@@ -354,7 +486,10 @@ class UIManager:
             self.update_help_text()
 
             left_title = self.app.query_one("#left-title")
-            left_title.update(f"Results for Tag: '{search_term}'")
+            if self.app.search_mode == "tag":
+                left_title.update(f"Results for Tag: '{search_term}'")
+            else:
+                left_title.update(f"Results for: '{search_term}'")
             right_title = self.app.query_one("#right-title")
             right_title.update("Details")
 
@@ -362,45 +497,37 @@ class UIManager:
             self.app.query_one("#task-tabs").remove_class("hidden")
             self.app.query_one("#task-details").remove_class("hidden")
 
-            search_results_data = self.app.controller.search_tasks_by_tag_name(search_term)
+            if self.app.search_mode == "tag":
+                search_results_data = self.app.controller.search_tasks_by_tag_name(search_term)
+            else:
+                search_results_data = self.app.controller.search_tasks(search_term)
 
             search_pending_tasks = [t for t in search_results_data if not t.is_completed]
             search_completed_tasks = [t for t in search_results_data if t.is_completed]
 
-            search_pending_tasks = TaskSorter.sort_tasks_by_priority(search_pending_tasks)
-            search_completed_tasks = TaskSorter.sort_tasks_by_priority(search_completed_tasks)
+            # Full-text results keep their relevance order
+            if self.app.search_mode == "tag":
+                search_pending_tasks = TaskSorter.sort_tasks_by_priority(search_pending_tasks)
+                search_completed_tasks = TaskSorter.sort_tasks_by_priority(search_completed_tasks)
 
             self.app.search_pending_results = search_pending_tasks
             self.app.search_completed_results = search_completed_tasks
 
             pending_list = self.app.query_one("#pending-tasks")
             completed_list = self.app.query_one("#completed-tasks")
-            pending_list.clear()
-            completed_list.clear()
-
-            for task in search_pending_tasks:
-                task_text = self.app.controller.get_task_display_text(task)
-                pending_list.append(ListItem(Label(task_text)))
-
-            for task in search_completed_tasks:
-                task_text = self.app.controller.get_task_display_text(task)
-                completed_list.append(ListItem(Label(task_text)))
-
-            if search_pending_tasks:
-                pending_list.index = 0
-                self.app.current_tab = "pending"
-                pending_list.focus()
-                self.show_task_details(search_pending_tasks[0])
-            elif search_completed_tasks:
-                completed_list.index = 0
-                self.app.current_tab = "completed"
-                completed_list.focus()
-                self.show_task_details(search_completed_tasks[0])
-            else:
-                pending_list.append(ListItem(Label("No matching tasks found")))
-                completed_list.append(ListItem(Label("No matching tasks found")))
+            self._patch_task_list(pending_list, search_pending_tasks)
+            self._patch_task_list(completed_list, search_completed_tasks)
+            self.app.schedule_countdowns()
+            self.update_tab_badges()
+
+            if not self._select_task_row(search_pending_tasks, search_completed_tasks):
+                pending_list.set_rows(["No matching tasks found"])
+                completed_list.set_rows(["No matching tasks found"])
                 task_details = self.app.query_one("#task-details")
-                task_details.update(f"No tasks found with tag '{search_term}'")
+                if self.app.search_mode == "tag":
+                    task_details.update(f"No tasks found with tag '{search_term}'")
+                else:
+                    task_details.update(f"No tasks found for '{search_term}'")
 
         except Exception as e:
             pass
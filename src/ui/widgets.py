@@ -1,4 +1,12 @@
-from textual.widgets import Input, TextArea
+from typing import Any, Dict, List, Optional
+from rich.errors import MarkupError
+from rich.text import Text
+from textual.binding import Binding
+from textual.geometry import Size
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Input, ListView, TextArea
 from textual import events
 
 class CustomInput(Input):
@@ -30,3 +38,173 @@ class CustomTextArea(TextArea):
                 self.screen.focus_previous()
             event.prevent_default()
             event.stop()
+
+
+STRIP_CACHE_SIZE = 512
+
+# Renders only the rows inside the viewport. Rows are markup strings, and
+# highlight changes are posted as ListView.Highlighted like a normal ListView.
+class VirtualListView(ScrollView, can_focus=True):
+    DEFAULT_CSS = """
+    VirtualListView {
+        background: $surface;
+    }
+
+    VirtualListView > .virtual-list--highlight {
+        color: $block-cursor-blurred-foreground;
+        background: $block-cursor-blurred-background;
+        text-style: $block-cursor-blurred-text-style;
+    }
+
+    VirtualListView:focus > .virtual-list--highlight {
+        color: $block-cursor-foreground;
+        background: $block-cursor-background;
+        text-style: $block-cursor-text-style;
+    }
+    """
+
+    COMPONENT_CLASSES = {"virtual-list--highlight"}
+
+    BINDINGS = [
+        Binding("up", "cursor_up", "Cursor up", show=False),
+        Binding("down", "cursor_down", "Cursor down", show=False),
+    ]
+
+    index = reactive[Optional[int]](None, init=False)
+
+    def __init__(self, name: str = None, id: str = None, classes: str = None):
+        super().__init__(name=name, id=id, classes=classes)
+        self.rows: List[str] = []
+        self.keys: List[Any] = []
+        self.key_positions: Dict[Any, int] = {}
+        self._strip_cache: Dict[tuple, Strip] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def set_rows(self, rows: List[str], keys: List[Any] = None):
+        # Patch the rows in place: the highlighted key keeps the cursor, the
+        # scroll offset is left alone and only visible lines that differ are repainted
+        keys = list(rows) if keys is None else list(keys)
+        old_rows, old_keys = self.rows, self.keys
+        old_index = self.index
+        highlighted_key = old_keys[old_index] if old_index is not None else None
+
+        self.rows = list(rows)
+        self.keys = keys
+        # The first of any duplicate keys wins, as list.index() would pick it
+        self.key_positions = {}
+        for position, key in enumerate(keys):
+            self.key_positions.setdefault(key, position)
+        self.virtual_size = Size(self.size.width, len(self.rows))
+
+        top = int(self.scroll_y)
+        for y in range(self.scrollable_content_region.height):
+            row_index = top + y
+            old_row = old_rows[row_index] if row_index < len(old_rows) else None
+            new_row = self.rows[row_index] if row_index < len(self.rows) else None
+            if old_row != new_row:
+                self.refresh_line(y)
+
+        if old_index is None or not self.rows:
+            self.index = None
+            return
+        new_index = self.key_positions.get(highlighted_key)
+        if new_index is None:
+            new_index = min(old_index, len(self.rows) - 1)
+        if new_index != old_index:
+            self.index = new_index
+        elif keys[new_index] != highlighted_key or self.rows[new_index] != old_rows[old_index]:
+            self.refresh_line(new_index - top)
+            self.post_message(ListView.Highlighted(self, None))
+
+    def clear(self):
+        self.set_rows([])
+
+    def set_row(self, key: Any, row: str):
+        position = self.key_positions.get(key)
+        if position is not None and self.rows[position] != row:
+            self.rows[position] = row
+            self.refresh_line(position - int(self.scroll_y))
+
+    def validate_index(self, index: Optional[int]) -> Optional[int]:
+        if index is None or not self.rows:
+            return None
+        return max(0, min(index, len(self.rows) - 1))
+
+    def watch_index(self, old_index: Optional[int], new_index: Optional[int]):
+        for row_index in (old_index, new_index):
+            if row_index is not None:
+                self.refresh_line(row_index - int(self.scroll_y))
+        if new_index is not None:
+            self._scroll_to_row(new_index)
+        self.post_message(ListView.Highlighted(self, None))
+
+    def _scroll_to_row(self, row_index: int):
+        height = self.scrollable_content_region.height
+        if row_index < self.scroll_y:
+            self.scroll_to(y=row_index, animate=False)
+        elif height and row_index >= self.scroll_y + height:
+            self.scroll_to(y=row_index - height + 1, animate=False)
+
+    def action_cursor_up(self):
+        if self.index is None:
+            self.index = 0
+        elif self.index > 0:
+            self.index -= 1
+
+    def action_cursor_down(self):
+        if self.index is None:
+            self.index = 0
+        else:
+            self.index += 1
+
+    def on_click(self, event: events.Click):
+        offset = event.get_content_offset(self)
+        if offset is not None:
+            self.focus()
+            row_index = offset.y + int(self.scroll_y)
+            if row_index < len(self.rows):
+                self.index = row_index
+
+    def on_resize(self, event: events.Resize):
+        self._strip_cache.clear()
+        self.virtual_size = Size(event.size.width, len(self.rows))
+
+    def on_focus(self, event: events.Focus):
+        self.refresh()
+
+    def on_blur(self, event: events.Blur):
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        row_index = y + int(self.scroll_y)
+        if row_index >= len(self.rows):
+            return Strip.blank(width, self.rich_style)
+
+        highlighted = row_index == self.index
+        row = self.rows[row_index]
+        cache_key = (row, width, highlighted, highlighted and self.has_focus)
+        strip = self._strip_cache.get(cache_key)
+        if strip is None:
+            if len(self._strip_cache) >= STRIP_CACHE_SIZE:
+                self._strip_cache.clear()
+            strip = self._render_row(row, width, highlighted)
+            self._strip_cache[cache_key] = strip
+        return strip
+
+    def _render_row(self, row: str, width: int, highlighted: bool) -> Strip:
+        try:
+            text = Text.from_markup(row)
+        except MarkupError:
+            text = Text(row)
+        text.no_wrap = True
+        text.truncate(max(width - 2, 0), overflow="ellipsis")
+        text.pad_left(1)
+
+        style = self.rich_style
+        if highlighted:
+            style += self.get_component_rich_style("virtual-list--highlight")
+        segments = text.render(self.app.console)
+        return Strip(segments).apply_style(style).extend_cell_length(width, style).crop(0, width)
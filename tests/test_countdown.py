@@ -0,0 +1,73 @@
+import pytest
+
+from app.countdown import BOUNDARY_SLACK, DAY, HOUR, MONTH, CountdownScheduler, next_label_change
+from app.helpers import DateTimeHelper
+from app.models import Task
+
+DUE_DATE = "2030-01-01T00:00:00+00:00"
+DUE_EPOCH = Task(id=0, user_id="u", name="", due_date=DUE_DATE).due_epoch
+
+
+def label(now: float) -> str:
+    return DateTimeHelper.format_time_remaining(DUE_EPOCH, now)
+
+
+@pytest.mark.parametrize("remaining, wait", [
+    # Exactly on a boundary: the label changes straight away
+    (0, 0),
+    (5 * HOUR, 0),
+    (DAY, 0),
+    (2 * DAY, 0),
+    (MONTH, 0),
+    (2 * MONTH, 0),
+    # Between boundaries: the label changes at the next one down
+    (5 * HOUR + 1, 1),
+    (DAY + 1, 1),
+    (DAY + 5 * HOUR, 5 * HOUR),
+    (MONTH + 1, 1),
+    (MONTH + 3 * DAY, 3 * DAY),
+    # Overdue: counted up in hours, then days
+    (-1, HOUR - 1),
+    (-(DAY - 1), 1),
+    (-DAY, DAY),
+    (-(3 * DAY + HOUR), DAY - HOUR),
+])
+def test_next_label_change_lands_just_after_the_label_changes(remaining, wait):
+    now = DUE_EPOCH - remaining
+    deadline = next_label_change(DUE_EPOCH, now)
+
+    assert deadline == now + wait + BOUNDARY_SLACK
+    assert label(deadline) != label(now)
+    if wait:
+        assert label(now + wait - 0.001) == label(now)
+
+
+def make_task(task_id: int, due_date: str = DUE_DATE, is_completed: bool = False) -> Task:
+    return Task(id=task_id, user_id="u", name=f"t{task_id}", due_date=due_date, is_completed=is_completed)
+
+
+def test_scheduler_reports_each_task_when_its_label_changes():
+    now = DUE_EPOCH - (2 * HOUR + 30)
+    scheduler = CountdownScheduler()
+    scheduler.sync([make_task(1), make_task(2, "2030-01-02T00:00:00+00:00"), make_task(3, None)], now)
+
+    assert scheduler.next_deadline() == now + 30 + BOUNDARY_SLACK
+    assert scheduler.pop_due(now + 29) == set()
+    assert scheduler.pop_due(now + 30 + BOUNDARY_SLACK) == {1}
+    # Rescheduled for the next hour down
+    assert scheduler.next_deadline() == now + HOUR + 30 + BOUNDARY_SLACK
+
+
+def test_scheduler_skips_completed_rescheduled_and_removed_tasks():
+    now = DUE_EPOCH - (2 * HOUR + 30)
+    scheduler = CountdownScheduler()
+    tasks = [make_task(1), make_task(2), make_task(3)]
+    scheduler.sync(tasks, now)
+
+    tasks[0].is_completed = True
+    tasks[1].due_date = "2030-01-05T00:00:00+00:00"
+    scheduler.sync(tasks[:2], now)
+
+    assert scheduler.pop_due(now + 30 + BOUNDARY_SLACK) == set()
+    assert scheduler.due_dates == {2: "2030-01-05T00:00:00+00:00"}
+    assert scheduler.next_deadline() == next_label_change(tasks[1].due_epoch, now)
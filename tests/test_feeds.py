@@ -0,0 +1,93 @@
+import asyncio
+
+from app.controllers import Controller
+from app.feeds import FakeChangeFeed
+
+WATERMARKS = ["2030-01-01T00:00:00+00:00", "2030-01-01T00:05:00+00:00"]
+
+
+def task_row(task_id: int, name: str) -> dict:
+    return {"id": task_id, "name": name, "user_id": "u", "created_at": None, "due_date": None, "is_completed": False}
+
+
+class DeltaService:
+    # Stands in for DatabaseService.sync(): hands out one prepared delta per call
+    def __init__(self, deltas):
+        self.deltas = list(deltas)
+        self.since = []
+
+    def sync(self, since=None):
+        self.since.append(since)
+        return self.deltas.pop(0)
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not reached")
+
+
+def test_reconnect_applies_catch_up_sync_before_live_events():
+    catch_up = {
+        "tasks": [task_row(1, "renamed while offline"), task_row(2, "created while offline")],
+        "tags": [],
+        "links": [],
+        "deleted": [{"table_name": "task_table", "row_id": 3, "tag_id": None, "deleted_at": WATERMARKS[1]}],
+        "watermark": WATERMARKS[1],
+    }
+    service = DeltaService([catch_up])
+    controller = Controller(None, "u", db_service=service)
+    controller._hydrate([task_row(1, "first"), task_row(3, "deleted while offline")], [], [])
+    controller.sync_watermark = WATERMARKS[0]
+
+    feed = FakeChangeFeed()
+    applied = []
+
+    def on_change(changes):
+        applied.append(("live", [task["name"] for task in changes.get("tasks", [])]))
+        controller.apply_feed_changes(changes)
+
+    async def sync():
+        changes = await controller.sync_with_remote_async()
+        applied.append(("sync", [task["name"] for task in changes.get("tasks", [])]))
+        controller.apply_changes(changes)
+
+    async def run():
+        syncs = []
+        feed.on_change = on_change
+        # The first connect has nothing to catch up on; later ones sync
+        feed.on_connected = lambda: syncs.append(asyncio.ensure_future(sync())) if feed.connect_count > 1 else None
+        runner = asyncio.ensure_future(feed.run())
+        await wait_for(lambda: feed.connected)
+
+        feed.emit("task_table", "UPDATE", task_row(1, "live before drop"))
+        feed.available = False
+        feed.drop()
+        await wait_for(lambda: not feed.connected)
+        # Missed while disconnected: only the catch-up sync can bring it in
+        feed.emit("task_table", "UPDATE", task_row(1, "lost"))
+
+        feed.available = True
+        await wait_for(lambda: syncs)
+        await syncs[0]
+        feed.emit("task_table", "UPDATE", task_row(2, "live after reconnect"))
+
+        await feed.close()
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert feed.connect_count == 2
+    assert service.since == [WATERMARKS[0]]
+    assert applied == [
+        ("live", ["live before drop"]),
+        ("sync", ["renamed while offline", "created while offline"]),
+        ("live", ["live after reconnect"]),
+    ]
+    assert controller.get_task_by_id(1).name == "renamed while offline"
+    assert controller.get_task_by_id(2).name == "live after reconnect"
+    assert controller.get_task_by_id(3) is None
+    assert controller.sync_watermark == WATERMARKS[1]
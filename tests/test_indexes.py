@@ -0,0 +1,72 @@
+import random
+import time
+from datetime import datetime, timezone
+
+from app.helpers import TaskSorter
+from app.indexes import SortedTaskList
+from app.models import Task
+
+DUE_DATE = "2030-01-01T00:00:00+00:00"
+
+
+def make_task(task_id: int, due_date: str = DUE_DATE) -> Task:
+    return Task(id=task_id, user_id="u", name=f"t{task_id}", due_date=due_date)
+
+
+def test_rebalance_keeps_identical_due_times_sorted():
+    tasks = [make_task(task_id) for task_id in (3, 1, 2)]
+    sorted_tasks = SortedTaskList(tasks)
+    due_epoch = tasks[0].due_epoch
+
+    assert sorted_tasks.rebalance(now=due_epoch + 1)
+    assert [task.id for task in sorted_tasks] == [1, 2, 3]
+    assert sorted_tasks.partition_keys[1] == sorted(sorted_tasks.partition_keys[1])
+
+    for task in tasks:
+        assert sorted_tasks.remove(task)
+    assert len(sorted_tasks) == 0
+
+
+def test_rebalance_moves_ahead_of_existing_overdue_tasks():
+    older = make_task(10, "2029-12-31T00:00:00+00:00")
+    tasks = [make_task(task_id) for task_id in (2, 1)]
+    sorted_tasks = SortedTaskList([older] + tasks)
+    sorted_tasks.rebalance(now=older.due_epoch + 1)
+
+    sorted_tasks.rebalance(now=tasks[0].due_epoch + 1)
+    assert [task.id for task in sorted_tasks] == [1, 2, 10]
+    assert sorted_tasks.remove(tasks[1])
+    assert [task.id for task in sorted_tasks] == [2, 10]
+
+
+def test_matches_task_sorter_through_adds_removes_and_rebalances(monkeypatch):
+    rng = random.Random(15)
+    start = 1_900_000_000
+    clock = [start]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+
+    def random_task(task_id: int) -> Task:
+        if rng.random() < 0.2:
+            return make_task(task_id, None)
+        # Whole hours around the clock, so several tasks share a due time
+        due_epoch = start + rng.randint(-48, 48) * 3600
+        return make_task(task_id, datetime.fromtimestamp(due_epoch, timezone.utc).isoformat())
+
+    tasks = {task_id: random_task(task_id) for task_id in range(1, 201)}
+    sorted_tasks = SortedTaskList(list(tasks.values())[:100])
+    sorted_tasks.extend(list(tasks.values())[100:150])
+    for task in list(tasks.values())[150:]:
+        sorted_tasks.add(task)
+
+    for step in range(300):
+        # Ten minutes a step: upcoming tasks keep falling due and move to overdue
+        clock[0] += 600
+        task_id = rng.choice(list(tasks))
+        assert sorted_tasks.remove(tasks.pop(task_id))
+        new_task = random_task(1000 + step)
+        tasks[new_task.id] = new_task
+        sorted_tasks.add(new_task)
+
+        expected = sorted(tasks.values(), key=lambda task: TaskSorter.sort_key(task, clock[0]))
+        assert [task.id for task in sorted_tasks] == [task.id for task in expected]
+    assert len(sorted_tasks) == len(tasks)
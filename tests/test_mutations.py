@@ -0,0 +1,155 @@
+import asyncio
+
+from app.models import Tag
+from app.mutations import MutationQueue
+
+
+class RecordingService:
+    # Stands in for DatabaseService: records each write and fails the ones listed in fail
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+        self.tag_ids = iter(range(100, 200))
+
+    def _call(self, name, *args):
+        self.calls.append((name, *args))
+        if name in self.fail:
+            raise ConnectionError(name)
+
+    def update_tasks(self, task_ids, updates):
+        self._call("update_tasks", sorted(task_ids), updates)
+        return [{"id": task_id} for task_id in task_ids]
+
+    def delete_tasks(self, task_ids):
+        self._call("delete_tasks", sorted(task_ids))
+        return True
+
+    def upsert_tags(self, tag_names):
+        self._call("upsert_tags", tag_names)
+        return [{"id": next(self.tag_ids), "name": tag_name, "user_id": "u"} for tag_name in tag_names]
+
+    def upsert_links(self, links):
+        self._call("upsert_links", links)
+        return True
+
+    def remove_other_tags(self, tag_ids_by_task):
+        self._call("remove_other_tags", tag_ids_by_task)
+        return True
+
+
+def run_queue(service, enqueue):
+    # Queues everything before the first flush so the writes coalesce
+    queue = MutationQueue(service, flush_delay=60)
+    rollbacks = []
+    queue.on_rollback = lambda: rollbacks.append("on_rollback")
+
+    async def run():
+        queue.start()
+        enqueue(queue, rollbacks)
+        await queue.flush()
+
+    asyncio.run(run())
+    return queue, rollbacks
+
+
+def test_updates_coalesce_into_one_request_per_change():
+    service = RecordingService()
+
+    def enqueue(queue, rollbacks):
+        queue.update_task(1, {"is_completed": True}, {"is_completed": False}, rollbacks.append)
+        queue.update_task(2, {"is_completed": True}, {"is_completed": False}, rollbacks.append)
+        queue.update_task(3, {"name": "a"}, {"name": "old"}, rollbacks.append)
+        queue.update_task(3, {"name": "b"}, {"name": "a"}, rollbacks.append)
+        # Toggled twice: back where it started, so nothing is sent
+        queue.update_task(4, {"is_completed": True}, {"is_completed": False}, rollbacks.append)
+        queue.update_task(4, {"is_completed": False}, {"is_completed": True}, rollbacks.append)
+
+    queue, rollbacks = run_queue(service, enqueue)
+
+    assert sorted(service.calls) == [
+        ("update_tasks", [1, 2], {"is_completed": True}),
+        ("update_tasks", [3], {"name": "b"}),
+    ]
+    assert rollbacks == []
+    assert queue.pending_count == 0
+
+
+def test_failed_update_rolls_back_to_the_values_before_the_first_edit():
+    service = RecordingService(fail={"update_tasks"})
+
+    def enqueue(queue, rollbacks):
+        queue.update_task(1, {"name": "a"}, {"name": "old"}, rollbacks.append)
+        queue.update_task(1, {"name": "b", "due_date": None}, {"name": "a", "due_date": "2030-01-01"}, rollbacks.append)
+
+    queue, rollbacks = run_queue(service, enqueue)
+
+    assert service.calls == [("update_tasks", [1], {"name": "b", "due_date": None})]
+    assert rollbacks == [{"name": "old", "due_date": "2030-01-01"}, "on_rollback"]
+
+
+def test_failed_delete_also_undoes_the_edits_it_replaced():
+    service = RecordingService(fail={"delete_tasks"})
+
+    def enqueue(queue, rollbacks):
+        queue.update_task(1, {"name": "a"}, {"name": "old"}, rollbacks.append)
+        queue.replace_task_tags(1, ["x"], {}, lambda: rollbacks.append("tags"))
+        queue.delete_task(1, lambda: rollbacks.append("delete"))
+
+    queue, rollbacks = run_queue(service, enqueue)
+
+    assert service.calls == [("delete_tasks", [1])]
+    assert rollbacks == ["delete", {"name": "old"}, "tags", "on_rollback"]
+
+
+def test_tag_edits_keep_the_last_names_and_link_before_unlinking():
+    service = RecordingService()
+    existing = Tag(id=7, name="keep", user_id="u")
+    linked = []
+
+    def enqueue(queue, rollbacks):
+        queue.replace_task_tags(1, ["gone"], {}, lambda: rollbacks.append("tags"))
+        queue.replace_task_tags(1, ["keep", "New"], {"keep": existing}, lambda: rollbacks.append("tags"), linked.append)
+        queue.replace_task_tags(2, [], {}, lambda: rollbacks.append("tags"))
+
+    queue, rollbacks = run_queue(service, enqueue)
+
+    assert service.calls == [
+        ("upsert_tags", ["New"]),
+        ("upsert_links", [{"task_id": 1, "tag_id": 7}, {"task_id": 1, "tag_id": 100}]),
+        ("remove_other_tags", {1: [7, 100], 2: []}),
+    ]
+    assert [[tag.name for tag in tags] for tags in linked] == [["keep", "New"]]
+    assert rollbacks == []
+
+
+def test_failed_unlink_rolls_back_the_tag_edit():
+    service = RecordingService(fail={"remove_other_tags"})
+
+    def enqueue(queue, rollbacks):
+        queue.replace_task_tags(1, ["keep"], {"keep": Tag(id=7, name="keep", user_id="u")}, lambda: rollbacks.append("tags"))
+
+    queue, rollbacks = run_queue(service, enqueue)
+
+    assert [call[0] for call in service.calls] == ["upsert_links", "remove_other_tags"]
+    assert rollbacks == ["tags", "on_rollback"]
+
+
+def test_writes_are_held_until_ready():
+    service = RecordingService()
+    queue = MutationQueue(service, flush_delay=60)
+    rollbacks = []
+
+    async def run():
+        queue.start(ready=False)
+        queue.update_task(1, {"is_completed": True}, {"is_completed": False}, rollbacks.append)
+        await queue.flush()
+        held = list(service.calls)
+        queue.set_ready()
+        await queue.flush()
+        return held
+
+    held = asyncio.run(run())
+
+    assert held == []
+    assert service.calls == [("update_tasks", [1], {"is_completed": True})]
+    assert rollbacks == []
@@ -0,0 +1,74 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("supabase")
+
+from app.clients import LazySupabaseClient
+from app.transport import ConnectionStats, TransportSettings, build_http_client
+
+USER = {
+    "id": "00000000-0000-0000-0000-000000000001",
+    "aud": "authenticated",
+    "app_metadata": {},
+    "user_metadata": {},
+    "created_at": "2030-01-01T00:00:00Z",
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Answers PostgREST and GoTrue GETs over HTTP/1.1 keep-alive and records
+    # which client socket each request came in on
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path.split("?")[0], self.client_address))
+        body = USER if self.path.startswith("/auth/v1/user") else [{"id": 1, "name": "task"}]
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_postgrest_and_auth_share_one_connection(server):
+    client = LazySupabaseClient(f"http://127.0.0.1:{server.server_port}", "anon-key", {"http2": False})
+    try:
+        for _ in range(3):
+            assert client.table("task_table").select("*").execute().data == [{"id": 1, "name": "task"}]
+            assert client.auth.get_user("access-token").user.id == USER["id"]
+        stats = client.http_stats.snapshot()
+    finally:
+        client.close()
+
+    assert [path for path, _ in server.requests] == ["/rest/v1/task_table", "/auth/v1/user"] * 3
+    assert len({address for _, address in server.requests}) == 1
+    assert stats == {"connections_opened": 1, "requests": 6, "http2_requests": 0, "reused_requests": 5}
+
+
+def test_stats_count_a_connection_per_request_without_keepalive(server):
+    stats = ConnectionStats()
+    settings = TransportSettings.from_dict({"max_keepalive_connections": 0, "http2": False, "unknown": 1})
+    with build_http_client(settings, stats) as http_client:
+        for _ in range(3):
+            http_client.get(f"http://127.0.0.1:{server.server_port}/rest/v1/task_table").raise_for_status()
+
+    assert len({address for _, address in server.requests}) == 3
+    assert stats.snapshot() == {"connections_opened": 3, "requests": 3, "http2_requests": 0, "reused_requests": 0}